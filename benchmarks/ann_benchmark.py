@@ -0,0 +1,80 @@
+"""Compare ANN index types against the exact flat baseline.
+
+Reports recall@k (overlap with the flat top-k) and single-query p50/p99 latency.
+
+    python -m benchmarks.ann_benchmark --size 50000 --dim 384
+    python -m benchmarks.ann_benchmark --runbooks runbooks/
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from incident_commander.rag.index_factory import INDEX_TYPES, build_index
+
+
+def synthetic_corpus(size: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    assignments = rng.integers(0, clusters, size=size)
+    return (centers[assignments] + 0.3 * rng.normal(size=(size, dim))).astype("float32")
+
+
+def runbook_corpus(path: str) -> np.ndarray:
+    from incident_commander.rag.embedder import Embedder
+    from incident_commander.utils.runbook_loader import load_runbooks
+
+    documents, _ = load_runbooks(path)
+    return np.array(Embedder().embed_batch(documents), dtype="float32")
+
+
+def measure(index: faiss.Index, queries: np.ndarray, k: int):
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    return np.array(found), np.array(latencies)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    parser.add_argument("--runbooks", help="embed the runbooks in this directory instead of synthetic vectors")
+    args = parser.parse_args()
+
+    corpus = runbook_corpus(args.runbooks) if args.runbooks else synthetic_corpus(args.size, args.dim)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype("float32")
+    k = min(args.k, len(corpus))
+
+    baseline, _ = build_index(corpus, "flat")
+    truth, _ = measure(baseline, queries, k)
+
+    print(f"corpus={len(corpus)} dim={corpus.shape[1]} queries={len(queries)} k={k}")
+    print(f"{'index':<10} {'build_s':>8} {'recall@k':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    for index_type in args.types.split(","):
+        start = time.perf_counter()
+        index, resolved = build_index(corpus, index_type)
+        build_seconds = time.perf_counter() - start
+
+        found, latencies = measure(index, queries, k)
+        print(
+            f"{resolved:<10} {build_seconds:>8.2f} {recall_at_k(found, truth):>9.3f} "
+            f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
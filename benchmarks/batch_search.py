@@ -0,0 +1,76 @@
+"""Throughput of VectorStore.search_batch against one search call per query.
+
+Builds an in-memory store over the runbook corpus, then replays a burst of alert-style
+queries both ways with the query embedding cache disabled, so every query pays a model
+forward pass. Also checks that both paths return the same ranked results.
+
+    python -m benchmarks.batch_search --queries 50
+"""
+import argparse
+import random
+import time
+from incident_commander.rag.embedder import Embedder
+from incident_commander.rag.vector_store import VectorStore
+from incident_commander.utils.runbook_loader import load_runbooks
+from incident_commander.utils.ttl_cache import TTLCache
+
+SERVICES = ["auth-service", "api-service", "db-service", "cache-service", "payments", "checkout"]
+SYMPTOMS = [
+    "pod crash detected OOMKilled",
+    "high CPU usage above 90%",
+    "error rate spike 5xx",
+    "database connection timeout pg_stat_activity",
+    "disk usage above 85% on node",
+    "network unreachable dns lookup failures",
+    "memory leak pods restarting",
+    "stale cache entries served",
+]
+
+
+def alert_queries(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(SERVICES)} {rng.choice(SYMPTOMS)} incident {i}" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--runbooks", default=None, help="runbook directory (defaults to RUNBOOKS_PATH)")
+    args = parser.parse_args()
+
+    store = VectorStore(embedder=Embedder(cache=TTLCache(max_size=0)))
+    documents, metadata = load_runbooks(args.runbooks)
+    store.initialize(documents, metadata)
+    queries = alert_queries(args.queries)
+    store.search_batch(queries[:2], top_k=args.top_k)  # warm the model
+
+    single_times, batch_times = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        single = [store.search(query, top_k=args.top_k) for query in queries]
+        single_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batched = store.search_batch(queries, top_k=args.top_k)
+        batch_times.append(time.perf_counter() - start)
+
+    same_ranking = all(
+        [r["content"] for r in a] == [r["content"] for r in b] for a, b in zip(single, batched)
+    )
+    max_score_diff = max(
+        (abs(x["score"] - y["score"]) for a, b in zip(single, batched) for x, y in zip(a, b)),
+        default=0.0,
+    )
+
+    single_best, batch_best = min(single_times), min(batch_times)
+    print(f"corpus={len(documents)} queries={len(queries)} top_k={args.top_k}")
+    print(f"single: {single_best * 1000:.1f} ms total, {len(queries) / single_best:.1f} queries/s")
+    print(f"batch:  {batch_best * 1000:.1f} ms total, {len(queries) / batch_best:.1f} queries/s")
+    print(f"speedup: {single_best / batch_best:.2f}x")
+    print(f"identical ranking: {same_ranking}, max score difference: {max_score_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare embedding inference backends against the torch baseline on the runbook corpus.
+
+Reports load time, corpus throughput, and drift from the baseline vectors: mean/min cosine
+similarity per chunk and recall@k of each chunk's nearest neighbours.
+
+    python -m benchmarks.embedding_backends --runbooks runbooks/
+    python -m benchmarks.embedding_backends --backends torch,int8 --repeat 5
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from incident_commander.rag.embedder import Embedder
+from incident_commander.rag.inference import BACKENDS
+from incident_commander.utils.runbook_loader import load_runbooks
+from benchmarks.ann_benchmark import recall_at_k
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def neighbours(vectors: np.ndarray, k: int) -> np.ndarray:
+    # k + 1 because every chunk is its own nearest neighbour.
+    _, ids = faiss.knn(vectors, vectors, k + 1)
+    return ids[:, 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runbooks", default="runbooks/")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model", help="defaults to EMBEDDING_MODEL")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the corpus")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    documents, _ = load_runbooks(args.runbooks)
+    k = min(args.k, len(documents) - 1)
+
+    print(f"chunks={len(documents)} k={k}")
+    print(f"{'backend':<8} {'load_s':>7} {'batch':>6} {'threads':>7} {'chunks/s':>9} {'cos_mean':>9} {'cos_min':>8} {'nn_recall':>10}")
+
+    baseline = None
+    for backend in args.backends.split(","):
+        embedder = Embedder(model_name=args.model, backend=backend)
+        if not embedder.is_available():
+            print(f"{backend:<8} unavailable: {embedder.error}")
+            continue
+
+        vectors = np.array(embedder.embed_batch(documents), dtype="float32")
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            embedder.embed_batch(documents)
+        rate = args.repeat * len(documents) / (time.perf_counter() - start)
+
+        vectors = normalize(vectors)
+        if baseline is None:
+            # The first backend listed is the reference for drift.
+            baseline = vectors
+            baseline_neighbours = neighbours(baseline, k)
+
+        cosine = np.sum(vectors * baseline, axis=1)
+        recall = recall_at_k(neighbours(vectors, k), baseline_neighbours)
+        status = embedder.status()
+        print(
+            f"{backend:<8} {status['load_seconds']:>7.2f} {status['batch_size']:>6} {str(status['threads']):>7} "
+            f"{rate:>9.1f} {cosine.mean():>9.4f} {cosine.min():>8.4f} {recall:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Memory/recall tradeoff of each vector storage, with and without exact float32 re-scoring.
+
+Reports serialized index size, bytes per vector, recall@k against the exact float32 flat
+baseline, and single-query p50 latency.
+
+    python -m benchmarks.quantization_report --size 50000 --dim 1024
+    python -m benchmarks.quantization_report --runbooks runbooks/ --index-type hnsw
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from incident_commander.rag.index_factory import STORAGE_TYPES, INDEX_TYPES, build_index, index_storage
+from benchmarks.ann_benchmark import synthetic_corpus, runbook_corpus, measure, recall_at_k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-type", default="flat", choices=INDEX_TYPES)
+    parser.add_argument("--storages", default=",".join(STORAGE_TYPES))
+    parser.add_argument("--runbooks", help="embed the runbooks in this directory instead of synthetic vectors")
+    args = parser.parse_args()
+
+    corpus = runbook_corpus(args.runbooks) if args.runbooks else synthetic_corpus(args.size, args.dim)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype("float32")
+    k = min(args.k, len(corpus))
+
+    baseline, _ = build_index(corpus, "flat", storage="float32", rescore=False)
+    truth, _ = measure(baseline, queries, k)
+
+    print(f"corpus={len(corpus)} dim={corpus.shape[1]} queries={len(queries)} k={k} index={args.index_type}")
+    print(f"{'storage':<10} {'rescore':>7} {'bytes':>12} {'B/vector':>9} {'recall@k':>9} {'p50_ms':>8}")
+    for storage in args.storages.split(","):
+        for rescore in (False, True):
+            if rescore and storage == "float32" and args.index_type != "ivf_pq":
+                continue
+
+            index, _ = build_index(corpus, args.index_type, storage=storage, rescore=rescore)
+            size = len(faiss.serialize_index(index))
+            found, latencies = measure(index, queries, k)
+            built_storage, _ = index_storage(index)
+            print(
+                f"{built_storage:<10} {str(rescore).lower():>7} {size:>12} {size / len(corpus):>9.1f} "
+                f"{recall_at_k(found, truth):>9.3f} {np.percentile(latencies, 50):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from ..mcp_clients.rag import MCPRAG
+from ..rag.fusion import reciprocal_rank_fusion
+from ..rag.reranker import Reranker
+from ..config import RERANK_ENABLED, MAX_SUB_QUERIES
+
+# Symptoms an alert can show: the phrase searched for, the root cause it suggests, the words
+# that reveal it in the metrics, and the word groups that reveal it in the description (a word
+# from every group must appear).
+SYMPTOMS = (
+    ("high CPU usage", "High CPU usage - possible resource exhaustion", ("cpu",), (("cpu",),)),
+    ("memory leak", "Memory leak or insufficient memory allocation", ("memory", "mem"), (("memory",),)),
+    ("error rate", "Application error or exception", ("error_rate", "errors"), (("error", "exception"),)),
+    ("pod crash OOM kill", "Pod crash or OOM kill", (), (("pod",), ("crash", "failure"))),
+    ("network or database timeout", "Network or database timeout", (), (("timeout",),)),
+)
 
 
 class AnalystAgent:
-    def __init__(self, rag_tool: MCPRAG = None):
+    def __init__(self, rag_tool: MCPRAG = None, reranker: Reranker = None):
         self.rag_tool = rag_tool or MCPRAG()
+        self.reranker = reranker if reranker is not None else (Reranker() if RERANK_ENABLED else None)
     
     def analyze(self, alert: Dict[str, Any]) -> Dict[str, Any]:
         service = alert.get("service", "unknown")
@@ -14,7 +29,14 @@ class AnalystAgent:
         
         query = self._build_search_query(alert)
         
-        runbook_snippets = self.rag_tool.retrieve(query, top_k=5)
+        sub_queries = self._build_sub_queries(alert)
+        
+        rerank = None
+        if self.reranker is not None:
+            candidates = self._retrieve(sub_queries, top_k=self.reranker.candidates)
+            runbook_snippets, rerank = self.reranker.rerank(query, candidates, top_k=5)
+        else:
+            runbook_snippets = self._retrieve(sub_queries, top_k=5)
         
         summary = self._generate_summary(alert, runbook_snippets)
         
@@ -27,9 +49,30 @@ class AnalystAgent:
             "root_causes": root_causes,
             "service": service,
             "severity": severity,
-            "recommendations": self._generate_recommendations(runbook_snippets)
+            "recommendations": self._generate_recommendations(runbook_snippets),
+            "sub_queries": sub_queries,
+            "rerank": rerank
         }
     
+    def _retrieve(self, sub_queries: List[str], top_k: int) -> List[Dict]:
+        # One batched call embeds and searches every sub-query together.
+        results = self.rag_tool.retrieve_batch(sub_queries, top_k=top_k)
+        if len(results) == 1:
+            return results[0]
+        # Results keep their retrieval score; the rank fusion is only used for ordering.
+        return reciprocal_rank_fusion(results, top_k=top_k, score_key="fused_score")
+    
+    def _detect_symptoms(self, alert: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """The (search phrase, root cause) of every symptom in SYMPTOMS the alert shows."""
+        description = alert.get("description", "").lower()
+        metrics = str(alert.get("metrics", {})).lower()
+        
+        return [
+            (phrase, cause) for phrase, cause, metric_words, description_groups in SYMPTOMS
+            if any(word in metrics for word in metric_words)
+            or (description_groups and all(any(word in description for word in group) for group in description_groups))
+        ]
+    
     def _build_search_query(self, alert: Dict[str, Any]) -> str:
         """Build search query from alert information"""
         service = alert.get("service", "")
@@ -37,17 +80,19 @@ class AnalystAgent:
         alert_type = alert.get("type", "")
         
         query_parts = [service, description, alert_type]
-        
-        metrics = alert.get("metrics", {})
-        if "cpu" in str(metrics).lower():
-            query_parts.append("high CPU usage")
-        if "memory" in str(metrics).lower() or "mem" in str(metrics).lower():
-            query_parts.append("memory leak")
-        if "error_rate" in metrics or "errors" in str(metrics).lower():
-            query_parts.append("error rate")
+        query_parts.extend(phrase for phrase, _ in self._detect_symptoms(alert))
         
         return " ".join(filter(None, query_parts))
     
+    def _build_sub_queries(self, alert: Dict[str, Any]) -> List[str]:
+        """The alert itself plus one focused query per detected symptom, up to MAX_SUB_QUERIES."""
+        service = alert.get("service", "")
+        base = " ".join(filter(None, [service, alert.get("description", ""), alert.get("type", "")]))
+        
+        queries = [base or self._build_search_query(alert)]
+        queries.extend(" ".join(filter(None, [service, phrase])) for phrase, _ in self._detect_symptoms(alert))
+        return list(dict.fromkeys(queries))[:max(MAX_SUB_QUERIES, 1)]
+    
     def _generate_summary(self, alert: Dict[str, Any], runbook_snippets: List[Dict]) -> str:
         service = alert.get("service", "unknown service")
         description = alert.get("description", "No description")
@@ -61,25 +106,7 @@ class AnalystAgent:
         return summary
     
     def _identify_root_causes(self, alert: Dict[str, Any], runbook_snippets: List[Dict]) -> List[str]:
-        causes = []
-        
-        description = alert.get("description", "").lower()
-        metrics = alert.get("metrics", {})
-        
-        if "pod" in description and ("crash" in description or "failure" in description):
-            causes.append("Pod crash or OOM kill")
-        
-        if "cpu" in description.lower() or metrics.get("cpu", 0) > 90:
-            causes.append("High CPU usage - possible resource exhaustion")
-        
-        if "memory" in description.lower() or metrics.get("memory", 0) > 90:
-            causes.append("Memory leak or insufficient memory allocation")
-        
-        if "timeout" in description.lower():
-            causes.append("Network or database timeout")
-        
-        if "error" in description.lower() or "exception" in description.lower():
-            causes.append("Application error or exception")
+        causes = [cause for _, cause in self._detect_symptoms(alert)]
         
         for snippet in runbook_snippets:
             content = snippet.get("content", "").lower()
@@ -86,6 +86,29 @@ class AuditorAgent:
         
         return audit_result
     
+    def audit_step(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-step findings available while the rest of a streamed plan is still being generated."""
+        warnings = []
+        step_risk = step.get("risk_score", 0.5)
+        if step_risk > self.risk_threshold:
+            warnings.append(f"Risk score ({step_risk:.2f}) exceeds threshold ({self.risk_threshold:.2f})")
+        
+        action = step.get("action", "").lower()
+        if any(op in action for op in ["delete", "kill", "terminate", "destroy", "drop"]):
+            warnings.append("Potentially destructive operation")
+        
+        recommendations = []
+        if step_risk > 0.3 and not step.get("rollback"):
+            recommendations.append("Consider adding rollback instructions")
+        
+        return {
+            "step_id": step.get("id"),
+            "risk_score": step_risk,
+            "warnings": warnings,
+            "recommendations": recommendations,
+            "requires_manual_approval": bool(warnings) or self.require_approval
+        }
+    
     def validate_role(self, user_role: str, plan: Dict[str, Any]) -> bool:
         allowed_roles = {
             "admin": ["all"],
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from ..mcp_clients.planner import MCPPlanner
 
 
@@ -7,13 +7,39 @@ class CommanderAgent:
         self.planner = planner or MCPPlanner()
     
     def create_plan(self, context_bundle: Dict[str, Any]) -> Dict[str, Any]:
+        alert, runbook_texts, chunk_ids, scores = self._planner_inputs(context_bundle)
+        plan = self.planner.create_plan(alert, runbook_texts, chunk_ids=chunk_ids, scores=scores)
+        return self._annotate(context_bundle, plan)
+    
+    async def acreate_plan(self, context_bundle: Dict[str, Any]) -> Dict[str, Any]:
+        alert, runbook_texts, chunk_ids, scores = self._planner_inputs(context_bundle)
+        plan = await self.planner.acreate_plan(alert, runbook_texts, chunk_ids=chunk_ids, scores=scores)
+        return self._annotate(context_bundle, plan)
+    
+    def stream_plan(self, context_bundle: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield the planner's step events as they arrive, then the annotated final plan event."""
+        alert, runbook_texts, chunk_ids, scores = self._planner_inputs(context_bundle)
+        for event in self.planner.stream_plan(alert, runbook_texts, chunk_ids=chunk_ids, scores=scores):
+            if event["type"] == "plan":
+                event = dict(event, plan=self._annotate(context_bundle, event["plan"]))
+            yield event
+    
+    def _planner_inputs(self, context_bundle: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str], Optional[List[Any]], Optional[List[float]]]:
         alert = context_bundle.get("alert", {})
         runbook_snippets = context_bundle.get("runbook_snippets", [])
         
         runbook_texts = [snippet.get("content", "") for snippet in runbook_snippets]
-        
-        plan = self.planner.create_plan(alert, runbook_texts)
-        
+        chunk_ids = [snippet.get("id") for snippet in runbook_snippets]
+        if None in chunk_ids:
+            # Fallback snippets have no chunk ids; the planner fingerprints their text instead.
+            chunk_ids = None
+        # Re-rank scores when the re-ranker ran, retrieval scores otherwise; they size each snippet's prompt budget.
+        scores = [snippet.get("rerank_score", snippet.get("score")) for snippet in runbook_snippets]
+        if None in scores:
+            scores = None
+        return alert, runbook_texts, chunk_ids, scores
+    
+    def _annotate(self, context_bundle: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
         plan["alert_summary"] = context_bundle.get("summary", "")
         plan["root_causes"] = context_bundle.get("root_causes", [])
         plan["service"] = context_bundle.get("service", "unknown")
@@ -0,0 +1,32 @@
+"""Build a versioned runbook index bundle offline, for servers to load with VECTOR_BUNDLE_PATH.
+
+Writes <output>/<version>/ (index, document store, bundle.json with embedder, chunker and
+checksums) and points <output>/LATEST at it.
+
+    python -m incident_commander.build_index --runbooks runbooks/ --output bundles/
+    python -m incident_commander.build_index --verify bundles/
+"""
+import argparse
+import json
+from .rag.bundle import build_bundle, verify_bundle, resolve_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runbooks", help="defaults to RUNBOOKS_PATH")
+    parser.add_argument("--output", default="bundles/")
+    parser.add_argument("--allow-fallback", action="store_true", help="build with hashed embeddings if the model cannot load")
+    parser.add_argument("--verify", metavar="BUNDLE", help="verify an existing bundle's checksums instead of building")
+    args = parser.parse_args()
+
+    if args.verify:
+        manifest = verify_bundle(resolve_bundle(args.verify), checksums=True)
+        print(f"Bundle {manifest['version']} OK ({len(manifest['files'])} files)")
+        return
+
+    manifest = build_bundle(args.output, args.runbooks, allow_fallback=args.allow_fallback)
+    print(json.dumps({key: value for key, value in manifest.items() if key != "files"}, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,67 @@ HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "huggingface")
 LLM_MODEL = os.getenv("LLM_MODEL", "Qwen/Qwen2.5-7B-Instruct")
+HUGGINGFACE_BASE_URL = os.getenv("HUGGINGFACE_BASE_URL", "https://api-inference.huggingface.co/models")
+OLLAMA_MAX_IN_FLIGHT = int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "2"))
+HUGGINGFACE_MAX_IN_FLIGHT = int(os.getenv("HUGGINGFACE_MAX_IN_FLIGHT", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+PLANNER_CONTEXT_TOKENS = int(os.getenv("PLANNER_CONTEXT_TOKENS", "4096"))
+PLANNER_MAX_NEW_TOKENS = int(os.getenv("PLANNER_MAX_NEW_TOKENS", "1024"))
+PLANNER_TOKENIZER = os.getenv("PLANNER_TOKENIZER", LLM_MODEL if LLM_PROVIDER == "huggingface" else "")
 
 MCP_MODE = os.getenv("MCP_MODE", "real")
 
 VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "vector_store/faiss_index")
+VECTOR_BUNDLE_PATH = os.getenv("VECTOR_BUNDLE_PATH", "")
+VECTOR_BUNDLE_CHECKSUMS = os.getenv("VECTOR_BUNDLE_CHECKSUMS", "false").lower() == "true"
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "false").lower() == "true"
+RESCORE_K_FACTOR = float(os.getenv("RESCORE_K_FACTOR", "4"))
+VECTOR_STORE_MMAP = os.getenv("VECTOR_STORE_MMAP", "false").lower() == "true"
+VECTOR_STORE_COMPACT_RATIO = float(os.getenv("VECTOR_STORE_COMPACT_RATIO", "0.25"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+FILTER_BRUTE_FORCE_MAX = int(os.getenv("FILTER_BRUTE_FORCE_MAX", "4096"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+MAX_SUB_QUERIES = int(os.getenv("MAX_SUB_QUERIES", "4"))
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.3"))
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-large-en")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "0"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_TUNING_PATH = os.getenv("EMBEDDING_TUNING_PATH", "vector_store/embedding_tuning.json")
+FALLBACK_EMBEDDING_DIM = int(os.getenv("FALLBACK_EMBEDDING_DIM", "512"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "vector_store/embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "300"))
+
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH", "vector_store/plan_cache.sqlite")
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "3600"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000"))
 
 MAX_PLAN_STEPS = int(os.getenv("MAX_PLAN_STEPS", "10"))
 RISK_THRESHOLD = float(os.getenv("RISK_THRESHOLD", "0.7"))
 REQUIRE_APPROVAL = os.getenv("REQUIRE_APPROVAL", "true").lower() == "true"
 
 RUNBOOKS_PATH = os.getenv("RUNBOOKS_PATH", "runbooks/")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+RUNBOOKS_WATCH = os.getenv("RUNBOOKS_WATCH", "true").lower() == "true"
+RUNBOOKS_POLL_SECONDS = float(os.getenv("RUNBOOKS_POLL_SECONDS", "5"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "48"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
 
 GRADIO_PORT = int(os.getenv("GRADIO_PORT", "7860"))
 GRADIO_SHARE = os.getenv("GRADIO_SHARE", "false").lower() == "true"
\ No newline at end of file
@@ -0,0 +1,151 @@
+import random
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, Tuple
+import httpx
+from ..utils.limiter import ConcurrencyLimiter
+from ..config import (
+    LLM_PROVIDER, LLM_MODEL, OLLAMA_BASE_URL, HUGGINGFACE_API_KEY, HUGGINGFACE_BASE_URL,
+    LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF, OLLAMA_MAX_IN_FLIGHT, HUGGINGFACE_MAX_IN_FLIGHT,
+    PLANNER_CONTEXT_TOKENS, PLANNER_MAX_NEW_TOKENS,
+)
+
+# Responses worth retrying: rate limiting, and the provider or a proxy in front of it failing.
+RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+# Upper bound on a single backoff sleep, whatever the attempt number.
+MAX_BACKOFF_SECONDS = 30.0
+
+# One in-flight limit per provider endpoint, shared by every client, event loop and thread.
+_limiters: Dict[Tuple[str, str], ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_limiter(provider: str, base_url: str, limit: int) -> ConcurrencyLimiter:
+    """The process-wide limiter for an endpoint; the first client to ask sets its limit."""
+    with _limiters_lock:
+        limiter = _limiters.get((provider, base_url))
+        if limiter is None:
+            limiter = _limiters[(provider, base_url)] = ConcurrencyLimiter(limit)
+        return limiter
+
+
+class AsyncLLMClient:
+    """Async text generation against Ollama or the Hugging Face inference API.
+
+    Requests share one pooled HTTP client per event loop, closed when that loop shuts down
+    (or by ``aclose``). At most ``max_in_flight`` requests run at once per provider endpoint,
+    across all clients, loops and threads. Timeouts, connection errors and retryable statuses
+    are retried with jittered exponential backoff. ``base_url`` can point at a local stub server.
+    """
+
+    def __init__(self, provider: str = None, model: str = None, base_url: str = None,
+                 max_in_flight: int = None, timeout: float = None, max_retries: int = None,
+                 backoff: float = None):
+        self.provider = provider or LLM_PROVIDER
+        self.model = model or LLM_MODEL
+        if self.provider == "ollama":
+            default_url, default_limit = OLLAMA_BASE_URL, OLLAMA_MAX_IN_FLIGHT
+        elif self.provider == "huggingface":
+            default_url, default_limit = HUGGINGFACE_BASE_URL, HUGGINGFACE_MAX_IN_FLIGHT
+        else:
+            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+
+        self.base_url = (base_url or default_url).rstrip("/")
+        self.max_in_flight = max(1, max_in_flight or default_limit)
+        self.timeout = LLM_TIMEOUT if timeout is None else timeout
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = LLM_RETRY_BACKOFF if backoff is None else backoff
+        self.retries = 0
+        self.limiter = provider_limiter(self.provider, self.base_url, self.max_in_flight)
+        # httpx clients belong to the loop they were created on: loop -> (client, lifetime).
+        self._clients = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    async def _bind(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            bound = self._clients.get(loop)
+            # Loops closed without asyncio.run() left their clients unclosed; nothing can close them now.
+            for old_loop in [old_loop for old_loop in self._clients if old_loop.is_closed()]:
+                del self._clients[old_loop]
+            created = bound is None
+            if created:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+                )
+                bound = self._clients[loop] = (client, self._lifetime(client))
+
+        client, lifetime = bound
+        if created:
+            # Started on this loop so that its shutdown finalizes it.
+            await lifetime.asend(None)
+        return client
+
+    async def _lifetime(self, client: httpx.AsyncClient):
+        # Parked on the client's loop: asyncio.run() closes pending async generators before it
+        # closes the loop, which closes the client's connections while the loop can still run them.
+        try:
+            yield
+        finally:
+            with self._clients_lock:
+                self._clients.pop(asyncio.get_running_loop(), None)
+            await client.aclose()
+
+    def _request(self, prompt: str) -> Dict[str, Any]:
+        if self.provider == "ollama":
+            return {
+                "url": f"{self.base_url}/api/chat",
+                "json": {
+                    "model": self.model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "stream": False,
+                    "options": {"temperature": 0.1, "num_ctx": PLANNER_CONTEXT_TOKENS, "num_predict": PLANNER_MAX_NEW_TOKENS},
+                },
+            }
+        return {
+            "url": f"{self.base_url}/{self.model}",
+            "headers": {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"},
+            "json": {
+                "inputs": prompt,
+                "parameters": {"temperature": 0.1, "max_new_tokens": PLANNER_MAX_NEW_TOKENS, "top_p": 0.9, "return_full_text": False},
+            },
+        }
+
+    def _text(self, body: Any) -> str:
+        if self.provider == "ollama":
+            return body["message"]["content"]
+        if isinstance(body, list):
+            body = body[0]
+        return body["generated_text"]
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter keeps concurrent incidents from retrying in lockstep.
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** attempt))
+
+    async def generate(self, prompt: str) -> str:
+        client = await self._bind()
+        request = self._request(prompt)
+        attempt = 0
+        while True:
+            try:
+                async with self.limiter:
+                    response = await client.post(**request)
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return self._text(response.json())
+            except httpx.TransportError:
+                # Timeouts and refused or dropped connections.
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(self._delay(attempt - 1))
+
+    async def aclose(self):
+        """Close the client of the running loop; clients of other loops close with their loops."""
+        with self._clients_lock:
+            bound = self._clients.get(asyncio.get_running_loop())
+        if bound is not None:
+            await bound[1].aclose()
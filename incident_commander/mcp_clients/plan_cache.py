@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional
+from ..config import PLAN_CACHE_PATH, PLAN_CACHE_TTL, PLAN_CACHE_MAX_ENTRIES, LLM_PROVIDER, LLM_MODEL
+
+
+def bucket_metric(value: Any) -> Any:
+    """Round numbers to one significant digit so e.g. cpu 91 and 94 share a bucket."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    return float(f"{value:.1g}")
+
+
+def incident_fingerprint(alert: Dict[str, Any], chunk_ids: List[Any]) -> str:
+    """Identify incidents that should get the same plan: same service, alert type, metric
+    buckets and retrieved runbook chunks, planned by the same model."""
+    key = {
+        "planner": [LLM_PROVIDER, LLM_MODEL],
+        "service": alert.get("service"),
+        "type": alert.get("type"),
+        "metrics": {name: bucket_metric(value) for name, value in sorted(alert.get("metrics", {}).items())},
+        "chunks": sorted(str(chunk) for chunk in chunk_ids),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """On-disk cache of generated plans keyed by incident fingerprint, with a time-to-live.
+
+    An empty path keeps the cache in memory for the life of the process.
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: float = None, max_entries: int = None):
+        self.path = PLAN_CACHE_PATH if path is None else path
+        self.ttl_seconds = PLAN_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries if max_entries is not None else PLAN_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "fingerprint TEXT PRIMARY KEY, plan TEXT NOT NULL, "
+                "generation_seconds REAL NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """A fresh copy of the cached plan with its original generation time, or None."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT plan, generation_seconds, created_at FROM plans WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM plans WHERE fingerprint = ?", (fingerprint,))
+                conn.commit()
+                self.expirations += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE plans SET last_used = ? WHERE fingerprint = ?", (now, fingerprint))
+            conn.commit()
+            self.hits += 1
+            self.seconds_saved += row[1]
+            return {"plan": json.loads(row[0]), "generation_seconds": row[1], "age_seconds": now - row[2]}
+
+    def put(self, fingerprint: str, plan: Dict[str, Any], generation_seconds: float):
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO plans (fingerprint, plan, generation_seconds, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, json.dumps(plan), generation_seconds, now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        if not self.max_entries or self.max_entries <= 0:
+            return
+
+        count = conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM plans WHERE fingerprint IN "
+                "(SELECT fingerprint FROM plans ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM plans")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._connect().execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,17 +1,27 @@
-import json
-from typing import Dict, List, Any
+import time
+import hashlib
+from typing import Dict, List, Any, Iterator
 from langchain_community.chat_models import ChatOllama
 from langchain_community.llms import HuggingFaceHub
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
-from ..config import LLM_PROVIDER, LLM_MODEL, OLLAMA_BASE_URL, HUGGINGFACE_API_KEY
+from ..config import LLM_PROVIDER, LLM_MODEL, OLLAMA_BASE_URL, HUGGINGFACE_API_KEY, PLANNER_CONTEXT_TOKENS, PLANNER_MAX_NEW_TOKENS
+from .plan_cache import PlanCache, incident_fingerprint
+from .llm_client import AsyncLLMClient
+from .prompt_builder import PromptBuilder
+from ..utils.json_stream import JsonArrayStream
+from ..utils.single_flight import SingleFlight, AbandonedCall
 
 class MCPPlanner:
-    def __init__(self):
+    def __init__(self, cache: PlanCache = None, async_client: AsyncLLMClient = None):
+        self.cache = cache if cache is not None else PlanCache()
         self.model = self._init_model()
+        self.flights = SingleFlight()
+        self.async_client = async_client if async_client is not None or self.model is None else AsyncLLMClient()
         self.parser = JsonOutputParser()
         self.prompt = self._init_prompt()
-        self.chain = self.prompt | self.model | self.parser
+        self.prompt_builder = PromptBuilder(self.prompt.template)
+        self.chain = self.prompt | self.model | self.parser if self.model is not None else None
 
     def _init_model(self):
         if LLM_PROVIDER == "ollama":
@@ -19,6 +29,8 @@ class MCPPlanner:
                 base_url=OLLAMA_BASE_URL,
                 model=LLM_MODEL,
                 temperature=0.1,
+                num_ctx=PLANNER_CONTEXT_TOKENS,
+                num_predict=PLANNER_MAX_NEW_TOKENS,
             )
         elif LLM_PROVIDER == "huggingface":
             return HuggingFaceHub(
@@ -27,7 +39,7 @@ class MCPPlanner:
                 task="text-generation",
                 model_kwargs={
                     "temperature": 0.1,
-                    "max_new_tokens": 1024,
+                    "max_new_tokens": PLANNER_MAX_NEW_TOKENS,
                     "top_p": 0.9,
                 }
             )
@@ -86,20 +98,150 @@ class MCPPlanner:
             input_variables=["alert_context", "runbook_snippets"],
         )
 
-    def create_plan(self, alert_context: Dict[str, Any], runbook_snippets: List[str]) -> Dict[str, Any]:
+    def create_plan(self, alert_context: Dict[str, Any], runbook_snippets: List[str], chunk_ids: List[Any] = None, scores: List[float] = None) -> Dict[str, Any]:
+        """Generate a plan, reusing one cached for the same incident fingerprint.
+
+        ``chunk_ids`` identify the retrieved runbook chunks; without them the snippet texts do.
+        Concurrent calls with the same fingerprint share one generation. Cached and shared
+        plans are returned as fresh copies and are still audited by the caller.
+        """
         if self.model is None:
             return self._generate_mock_plan(alert_context, runbook_snippets)
 
+        fingerprint = self._fingerprint(alert_context, runbook_snippets, chunk_ids)
+        plan = self._cached_plan(fingerprint)
+        if plan is not None:
+            return plan
+
+        plan, shared = self.flights.do(fingerprint, lambda: self._generate_plan(fingerprint, alert_context, runbook_snippets, scores))
+        return self._mark_coalesced(plan) if shared else plan
+
+    def _generate_plan(self, fingerprint: str, alert_context: Dict[str, Any], runbook_snippets: List[str], scores: List[float] = None) -> Dict[str, Any]:
+        try:
+            start = time.perf_counter()
+            plan_json = self.chain.invoke(self._inputs(alert_context, runbook_snippets, scores))
+            return self._finish_plan(fingerprint, plan_json, time.perf_counter() - start)
+        except Exception as e:
+            print(f"LLM plan generation failed: {e}")
+            return self._generate_mock_plan(alert_context, runbook_snippets)
+
+    async def acreate_plan(self, alert_context: Dict[str, Any], runbook_snippets: List[str], chunk_ids: List[Any] = None, scores: List[float] = None) -> Dict[str, Any]:
+        """Async ``create_plan`` over pooled HTTP connections, limited to the provider's max in flight."""
+        if self.async_client is None:
+            return self._generate_mock_plan(alert_context, runbook_snippets)
+
+        fingerprint = self._fingerprint(alert_context, runbook_snippets, chunk_ids)
+        plan = self._cached_plan(fingerprint)
+        if plan is not None:
+            return plan
+
+        plan, shared = await self.flights.ado(fingerprint, lambda: self._agenerate_plan(fingerprint, alert_context, runbook_snippets, scores))
+        return self._mark_coalesced(plan) if shared else plan
+
+    async def _agenerate_plan(self, fingerprint: str, alert_context: Dict[str, Any], runbook_snippets: List[str], scores: List[float] = None) -> Dict[str, Any]:
         try:
-            plan_json = self.chain.invoke({
-                "alert_context": json.dumps(alert_context),
-                "runbook_snippets": "\n---\n".join(runbook_snippets)
-            })
-            return self._validate_plan(plan_json)
+            start = time.perf_counter()
+            text = await self.async_client.generate(self.prompt.format(**self._inputs(alert_context, runbook_snippets, scores)))
+            plan_json = self.parser.parse(text)
+            return self._finish_plan(fingerprint, plan_json, time.perf_counter() - start)
         except Exception as e:
             print(f"LLM plan generation failed: {e}")
             return self._generate_mock_plan(alert_context, runbook_snippets)
 
+    def stream_plan(self, alert_context: Dict[str, Any], runbook_snippets: List[str], chunk_ids: List[Any] = None, scores: List[float] = None) -> Iterator[Dict[str, Any]]:
+        """Generate a plan like ``create_plan``, yielding each step as soon as the model completes it.
+
+        Yields ``{"type": "step", "step": ...}`` events followed by one
+        ``{"type": "plan", "plan": ...}`` event. The final plan is authoritative: if generation
+        fails part-way it is the fallback plan, not the steps streamed so far. Like
+        ``create_plan``, concurrent calls with the same fingerprint share one generation.
+        """
+        if self.model is None:
+            yield from self._replay(self._generate_mock_plan(alert_context, runbook_snippets))
+            return
+
+        fingerprint = self._fingerprint(alert_context, runbook_snippets, chunk_ids)
+        plan = self._cached_plan(fingerprint)
+        if plan is not None:
+            yield from self._replay(plan)
+            return
+
+        try:
+            for event, shared in self.flights.do_stream(
+                fingerprint,
+                lambda: self._generate_stream(fingerprint, alert_context, runbook_snippets, scores),
+                result=lambda event: event["plan"],
+            ):
+                if shared:
+                    # Waited on an identical generation; its steps arrive all at once.
+                    yield from self._replay(self._mark_coalesced(event))
+                else:
+                    yield event
+        except AbandonedCall:
+            yield from self._generate_stream(fingerprint, alert_context, runbook_snippets, scores)
+
+    def _generate_stream(self, fingerprint: str, alert_context: Dict[str, Any], runbook_snippets: List[str], scores: List[float] = None) -> Iterator[Dict[str, Any]]:
+        try:
+            start = time.perf_counter()
+            steps = JsonArrayStream("steps")
+            emitted = 0
+            for chunk in (self.prompt | self.model).stream(self._inputs(alert_context, runbook_snippets, scores)):
+                # Chat models stream message chunks, plain LLMs stream strings.
+                text = getattr(chunk, "content", chunk)
+                for step in steps.feed(text):
+                    yield {"type": "step", "step": self._validate_step(step, emitted)}
+                    emitted += 1
+            plan_json = self.parser.parse(steps.text)
+            plan = self._finish_plan(fingerprint, plan_json, time.perf_counter() - start)
+        except Exception as e:
+            print(f"LLM plan generation failed: {e}")
+            plan = self._generate_mock_plan(alert_context, runbook_snippets)
+        yield {"type": "plan", "plan": plan}
+
+    def _inputs(self, alert_context: Dict[str, Any], runbook_snippets: List[str], scores: List[float] = None) -> Dict[str, str]:
+        # Fitted to the context window; snippets beyond the budget are trimmed or dropped by relevance.
+        inputs, _ = self.prompt_builder.build(alert_context, runbook_snippets, scores)
+        return inputs
+
+    def _fingerprint(self, alert_context: Dict[str, Any], runbook_snippets: List[str], chunk_ids: List[Any] = None) -> str:
+        if chunk_ids is None:
+            chunk_ids = [hashlib.sha256(snippet.encode("utf-8")).hexdigest() for snippet in runbook_snippets]
+        return incident_fingerprint(alert_context, chunk_ids)
+
+    def _cached_plan(self, fingerprint: str) -> Dict[str, Any]:
+        cached = self.cache.get(fingerprint)
+        if cached is None:
+            return None
+
+        plan = cached["plan"]
+        plan["plan_cache"] = {
+            "hit": True,
+            "fingerprint": fingerprint[:16],
+            "age_seconds": round(cached["age_seconds"], 1),
+            "seconds_saved": round(cached["generation_seconds"], 2),
+        }
+        return plan
+
+    def _finish_plan(self, fingerprint: str, plan_json: Any, generation_seconds: float) -> Dict[str, Any]:
+        plan = self._validate_plan(plan_json)
+        # Only model output is cached; mock fallbacks should be retried next time.
+        if isinstance(plan_json, dict) and "steps" in plan_json:
+            self.cache.put(fingerprint, plan, generation_seconds)
+        plan["plan_cache"] = {"hit": False, "fingerprint": fingerprint[:16], "generation_seconds": round(generation_seconds, 2)}
+        return plan
+
+    @staticmethod
+    def _mark_coalesced(plan: Dict[str, Any]) -> Dict[str, Any]:
+        # Waited on an identical in-flight generation rather than starting its own.
+        plan.setdefault("plan_cache", {"hit": False})["coalesced"] = True
+        return plan
+
+    @staticmethod
+    def _replay(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        for step in plan.get("steps", []):
+            yield {"type": "step", "step": step}
+        yield {"type": "plan", "plan": plan}
+
     def _generate_mock_plan(self, alert_context: Dict, runbook_snippets: List[str]) -> Dict:
         service = alert_context.get('service', 'unknown-service')
         return {
@@ -125,8 +267,13 @@ class MCPPlanner:
         plan.setdefault("total_risk_score", max([s.get("risk_score", 0.0) for s in plan.get("steps", [])], default=0.0))
 
         for i, step in enumerate(plan["steps"]):
-            step.setdefault("id", i + 1)
-            step.setdefault("risk_score", 0.5)
-            step.setdefault("dependencies", [])
+            self._validate_step(step, i)
+
+        return plan
 
-        return plan
\ No newline at end of file
+    @staticmethod
+    def _validate_step(step: Dict, index: int) -> Dict:
+        step.setdefault("id", index + 1)
+        step.setdefault("risk_score", 0.5)
+        step.setdefault("dependencies", [])
+        return step
\ No newline at end of file
@@ -0,0 +1,205 @@
+import json
+from typing import Any, Dict, List, Tuple
+from ..config import PLANNER_TOKENIZER, PLANNER_CONTEXT_TOKENS, PLANNER_MAX_NEW_TOKENS
+from ..rag.reranker import query_terms
+from ..utils.chunker import iter_blocks, HEADING, CODE
+from ..utils.tokens import count_tokens
+
+SNIPPET_SEPARATOR = "\n---\n"
+ELISION = "[...]"
+# Most of the prompt belongs to the runbooks; an oversized alert is trimmed to this share.
+ALERT_BUDGET_SHARE = 0.25
+# Snippets that would get fewer tokens than this are dropped rather than cut to a stub.
+MIN_SNIPPET_TOKENS = 32
+# The regex count runs below BPE counts on commands and identifiers; pad it without a tokenizer.
+HEURISTIC_MARGIN = 1.15
+
+
+def allocate(sizes: List[int], weights: List[float], budget: int, minimum: int = 0) -> List[int]:
+    """Split ``budget`` tokens across items in proportion to ``weights``.
+
+    Items needing less than their share get what they need and the rest is shared again
+    among the others. Items whose share would be below ``minimum`` get 0, lowest weight
+    first, so the survivors keep a useful size.
+    """
+    active = [i for i, size in enumerate(sizes) if size > 0]
+    while True:
+        shares = [0] * len(sizes)
+        remaining, pool = list(active), budget
+        while remaining:
+            total = sum(weights[i] for i in remaining)
+            satisfied = [i for i in remaining if sizes[i] <= pool * weights[i] / total]
+            if not satisfied:
+                for i in remaining:
+                    shares[i] = int(pool * weights[i] / total)
+                break
+            for i in satisfied:
+                shares[i] = sizes[i]
+                pool -= sizes[i]
+                remaining.remove(i)
+
+        starved = [i for i in active if shares[i] < min(minimum, sizes[i])]
+        if not starved:
+            return shares
+        active.remove(min(starved, key=lambda i: weights[i]))
+
+
+class PromptBuilder:
+    """Fit the alert and runbook snippets into the planner's context window.
+
+    Tokens are counted with the configured model's tokenizer, or estimated when it cannot be
+    loaded. What is left after the template and the reserved output tokens is shared across
+    snippets by relevance score; snippets over their share are shortened extractively,
+    keeping their heading, code blocks and the lines that mention the alert, in order.
+    """
+
+    def __init__(self, template: str, tokenizer_name: str = None, context_tokens: int = None, output_tokens: int = None):
+        self.template = template
+        self.tokenizer_name = PLANNER_TOKENIZER if tokenizer_name is None else tokenizer_name
+        self.context_tokens = context_tokens or PLANNER_CONTEXT_TOKENS
+        self.output_tokens = PLANNER_MAX_NEW_TOKENS if output_tokens is None else output_tokens
+        self.tokenizer = None
+        self._loaded = False
+        self._template_tokens = None
+
+    @property
+    def counter(self) -> str:
+        self._load_tokenizer()
+        return self.tokenizer_name if self.tokenizer is not None else "estimate"
+
+    def _load_tokenizer(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.tokenizer_name:
+            return
+        try:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        except Exception as e:
+            print(f"Warning: Could not load tokenizer {self.tokenizer_name}: {e}; estimating prompt tokens")
+
+    def count(self, text: str) -> int:
+        self._load_tokenizer()
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return int(count_tokens(text) * HEURISTIC_MARGIN + 0.5)
+
+    def build(self, alert_context: Dict[str, Any], runbook_snippets: List[str], scores: List[float] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Prompt inputs for the planner chain, and a report of the token counts."""
+        if self._template_tokens is None:
+            self._template_tokens = self.count(self.template)
+        available = max(self.context_tokens - self.output_tokens - self._template_tokens, 0)
+
+        alert_text = self._fit_alert(alert_context, int(available * ALERT_BUDGET_SHARE))
+        alert_tokens = self.count(alert_text)
+
+        sizes = [self.count(snippet) for snippet in runbook_snippets]
+        if scores is None:
+            # Snippets arrive ranked.
+            scores = [1.0 / (rank + 1) for rank in range(len(runbook_snippets))]
+        weights = [max(score, 0.0) + 1e-6 for score in scores]
+        separators = self.count(SNIPPET_SEPARATOR) * max(len(runbook_snippets) - 1, 0)
+        shares = allocate(sizes, weights, max(available - alert_tokens - separators, 0), MIN_SNIPPET_TOKENS)
+
+        kept, trimmed = [], 0
+        for snippet, size, share in zip(runbook_snippets, sizes, shares):
+            if share <= 0:
+                continue
+            if size > share:
+                snippet = self._trim(snippet, share, alert_text)
+                trimmed += 1
+            if snippet:
+                kept.append(snippet)
+
+        inputs = {"alert_context": alert_text, "runbook_snippets": SNIPPET_SEPARATOR.join(kept)}
+        snippet_tokens = self.count(inputs["runbook_snippets"])
+        report = {
+            "counter": self.counter,
+            "context_tokens": self.context_tokens,
+            "prompt_tokens": self._template_tokens + alert_tokens + snippet_tokens,
+            "alert_tokens": alert_tokens,
+            "snippet_tokens": snippet_tokens,
+            "snippet_tokens_before": sum(sizes) + separators,
+            "snippets": len(kept),
+            "trimmed": trimmed,
+            "dropped": len(runbook_snippets) - len(kept),
+        }
+        print(
+            f"Planner prompt: {report['prompt_tokens']} tokens of {available + self._template_tokens} "
+            f"(alert {alert_tokens}, snippets {snippet_tokens} of {report['snippet_tokens_before']}, "
+            f"{trimmed} trimmed, {report['dropped']} dropped; {report['counter']})"
+        )
+        return inputs, report
+
+    def _fit_alert(self, alert_context: Dict[str, Any], budget: int) -> str:
+        alert = dict(alert_context)
+        text = json.dumps(alert)
+        # Shorten the longest string field (usually the description or a log excerpt) until it fits.
+        while self.count(text) > budget:
+            longest = max((key for key, value in alert.items() if isinstance(value, str)), key=lambda key: len(alert[key]), default=None)
+            if longest is None or len(alert[longest]) <= len(ELISION):
+                break
+            alert[longest] = alert[longest][:len(alert[longest]) // 2].rstrip() + ELISION
+            text = json.dumps(alert)
+        return text
+
+    def _trim(self, snippet: str, budget: int, alert_text: str) -> str:
+        units = []
+        for kind, _, text in iter_blocks(snippet.splitlines()):
+            if kind == HEADING or kind == CODE:
+                units.append((kind, text))
+            else:
+                units.extend((kind, line) for line in text.splitlines())
+
+        terms = query_terms(alert_text)
+        scored = []
+        for position, (kind, text) in enumerate(units):
+            if kind == HEADING:
+                score = 3.0 if position == 0 else 1.0
+            else:
+                score = len(terms & query_terms(text)) + (1.5 if kind == CODE else 0.0)
+            scored.append((score, -position, position))
+
+        chosen, used = set(), self.count(ELISION)
+        for _, _, position in sorted(scored, reverse=True):
+            size = self.count(units[position][1]) + 1
+            if used + size <= budget:
+                chosen.add(position)
+                used += size
+
+        text = self._assemble(units, chosen)
+        # Elision markers between the kept units were not counted above.
+        for _, _, position in sorted(scored):
+            if self.count(text) <= budget:
+                break
+            if position in chosen:
+                chosen.discard(position)
+                text = self._assemble(units, chosen)
+
+        if not chosen:
+            # Not even one line fits: keep the start of the snippet.
+            return self._truncate(snippet, budget - self.count(ELISION)) + ELISION
+        return text
+
+    @staticmethod
+    def _assemble(units: List[Tuple[str, str]], chosen: set) -> str:
+        lines, previous = [], -1
+        for position in sorted(chosen):
+            if position != previous + 1:
+                lines.append(ELISION)
+            lines.append(units[position][1])
+            previous = position
+        if previous != len(units) - 1:
+            lines.append(ELISION)
+        return "\n".join(lines)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        if budget <= 0:
+            return ""
+        end = int(len(text) * budget / max(self.count(text), 1))
+        while end > 0 and self.count(text[:end]) > budget:
+            end = int(end * 0.9)
+        return text[:end].rstrip()
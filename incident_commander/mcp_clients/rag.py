@@ -1,21 +1,68 @@
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Union
 from ..rag.vector_store import VectorStore
+from ..rag.snapshots import IndexSnapshots
+from ..utils.ttl_cache import TTLCache
+from ..config import RETRIEVAL_MODE, RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL
 
 
 class MCPRAG:
-    def __init__(self, vector_store: VectorStore = None):
-        self.vector_store = vector_store or VectorStore()
+    def __init__(self, vector_store: Union[VectorStore, IndexSnapshots] = None, mode: str = None, cache: TTLCache = None):
+        if not isinstance(vector_store, IndexSnapshots):
+            vector_store = IndexSnapshots(vector_store or VectorStore())
+        self.snapshots = vector_store
+        self.mode = mode or RETRIEVAL_MODE
+        self.cache = cache if cache is not None else TTLCache(max_size=RETRIEVAL_CACHE_SIZE, ttl_seconds=RETRIEVAL_CACHE_TTL)
     
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        if not self.vector_store.is_initialized():
-            return self._get_fallback_results(query)
+    @property
+    def vector_store(self) -> VectorStore:
+        return self.snapshots.current()
+    
+    def retrieve(self, query: str, top_k: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        return self.retrieve_batch([query], top_k=top_k, filters=filters)[0]
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = 5, filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        # One snapshot for the whole call, even if a rebuilt index is published meanwhile.
+        vector_store = self.vector_store
+        if not vector_store.is_initialized():
+            return [self._get_fallback_results(query) for query in queries]
+        
+        mode = self.mode
+        if mode == "dense" and not vector_store.can_search_dense(wait=False):
+            # Serve lexically until the embedding model has warmed up, or if it cannot search this index.
+            mode = "lexical"
         
-        results = self.vector_store.search(query, top_k=top_k)
+        # Hybrid results change when the embedder becomes ready, so that is part of the key too.
+        dense = mode != "lexical" and vector_store.can_search_dense(wait=False)
+        filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else None
+        keys = [(vector_store.version, mode, dense, " ".join(query.split()), top_k, filters_key) for query in queries]
         
+        results = [self.cache.get(key) for key in keys]
+        misses = list(dict.fromkeys(query for query, cached in zip(queries, results) if cached is None))
+        if misses:
+            if mode == "dense":
+                fresh = vector_store.search_batch(misses, top_k=top_k, filters=filters)
+            elif mode == "lexical":
+                fresh = [vector_store.lexical_search(query, top_k=top_k, filters=filters) for query in misses]
+            else:
+                fresh = vector_store.hybrid_search_batch(misses, top_k=top_k, filters=filters)
+            fresh = dict(zip(misses, (self._format_results(query_results) for query_results in fresh)))
+            
+            for i, (query, key) in enumerate(zip(queries, keys)):
+                if results[i] is None:
+                    results[i] = fresh[query]
+                    self.cache.set(key, results[i])
+        
+        # Copies, so callers annotating results do not alter the cached entries.
+        return [[dict(result) for result in query_results] for query_results in results]
+    
+    def _format_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         return [
             {
+                "id": result.get("id"),
                 "content": result.get("content", ""),
                 "source": result.get("source", "unknown"),
+                "sources": result.get("sources", [result.get("source", "unknown")]),
                 "score": result.get("score", 0.0),
                 "metadata": result.get("metadata", {})
             }
@@ -1,5 +1,6 @@
 import time
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, Iterator, Optional
 from .agents.analyst import AnalystAgent
 from .agents.commander import CommanderAgent
 from .agents.executor_agent import ExecutorAgent
@@ -57,6 +58,86 @@ class AgentOrchestrator:
             "timestamp": time.time()
         }
     
+    async def aprocess_incident(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """Async ``process_incident`` for handling several incidents concurrently.
+        
+        Retrieval runs in a worker thread; plan generation awaits the planner's pooled async
+        client, so concurrent incidents queue on its in-flight limit instead of on threads.
+        """
+        incident_id = f"incident_{int(time.time())}"
+        
+        context_bundle = await asyncio.to_thread(self.analyst.analyze, alert)
+        self.current_incident = {
+            "id": incident_id,
+            "alert": alert,
+            "context": context_bundle,
+            "timestamp": time.time()
+        }
+        
+        plan = await self.commander.acreate_plan(context_bundle)
+        plan["id"] = f"plan_{incident_id}"
+        self.current_plan = plan
+        
+        audit_result = self.auditor.audit_plan(plan)
+        
+        return {
+            "incident_id": incident_id,
+            "alert": alert,
+            "context_bundle": context_bundle,
+            "plan": plan,
+            "audit": audit_result,
+            "status": "planned",
+            "timestamp": time.time()
+        }
+    
+    def process_incident_stream(self, alert: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Like ``process_incident``, but yield the response after every planned step.
+        
+        Partial responses have status "planning", the steps generated so far and a per-step
+        audit; the last response is the same as ``process_incident`` returns.
+        """
+        incident_id = f"incident_{int(time.time())}"
+        
+        context_bundle = self.analyst.analyze(alert)
+        self.current_incident = {
+            "id": incident_id,
+            "alert": alert,
+            "context": context_bundle,
+            "timestamp": time.time()
+        }
+        
+        steps, step_audits = [], []
+        for event in self.commander.stream_plan(context_bundle):
+            if event["type"] == "step":
+                steps.append(event["step"])
+                step_audits.append(self.auditor.audit_step(event["step"]))
+                yield {
+                    "incident_id": incident_id,
+                    "alert": alert,
+                    "context_bundle": context_bundle,
+                    "plan": {"steps": list(steps)},
+                    "audit": {"step_audits": list(step_audits)},
+                    "status": "planning",
+                    "timestamp": time.time()
+                }
+                continue
+            
+            plan = event["plan"]
+            plan["id"] = f"plan_{incident_id}"
+            self.current_plan = plan
+            
+            # The complete plan is always audited as a whole, whatever was streamed before it.
+            audit_result = self.auditor.audit_plan(plan)
+            yield {
+                "incident_id": incident_id,
+                "alert": alert,
+                "context_bundle": context_bundle,
+                "plan": plan,
+                "audit": audit_result,
+                "status": "planned",
+                "timestamp": time.time()
+            }
+    
     def execute_plan(self, plan: Optional[Dict[str, Any]] = None, step_by_step: bool = False) -> Dict[str, Any]:
         plan_to_execute = plan or self.current_plan
         
@@ -1,4 +1,5 @@
 from .vector_store import VectorStore
 from .embedder import Embedder
+from .indexer import RunbookIndexer
 
-__all__ = ["VectorStore", "Embedder"]
+__all__ = ["VectorStore", "Embedder", "RunbookIndexer"]
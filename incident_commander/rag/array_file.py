@@ -0,0 +1,89 @@
+import json
+import mmap
+import bisect
+import struct
+from collections.abc import Sequence
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from ..utils.files import replacing
+
+MAGIC = b"ICARRS01"
+# magic, then the byte length of the JSON table of contents that follows it.
+HEADER = struct.Struct("<8sQ")
+# Arrays start on this boundary so numpy views of the mapping are aligned.
+ALIGNMENT = 8
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray], attrs: Dict[str, Any] = None):
+    """Write named 1-d arrays and JSON attributes to one file, atomically replacing ``path``."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    sections, position = {}, 0
+    for name, array in arrays.items():
+        sections[name] = {"dtype": array.dtype.str, "count": len(array), "offset": position}
+        position = _aligned(position + array.nbytes)
+
+    toc = json.dumps({"attrs": attrs or {}, "arrays": sections}, separators=(",", ":")).encode("utf-8")
+    data_pos = _aligned(HEADER.size + len(toc))
+    with replacing(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(toc)))
+        f.write(toc)
+        f.write(b"\0" * (data_pos - HEADER.size - len(toc)))
+        for name, array in arrays.items():
+            f.write(array.tobytes())
+            f.write(b"\0" * (_aligned(array.nbytes) - array.nbytes))
+
+
+def read_arrays(path: str, mmap_file: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Read a file written by ``write_arrays`` as read-only arrays and its attributes.
+
+    With ``mmap_file`` the arrays are views of a read-only mapping, whose pages are shared
+    through the OS page cache by every process mapping the same file.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if mmap_file else f.read()
+
+    magic, toc_size = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an array file")
+    toc = json.loads(bytes(buffer[HEADER.size:HEADER.size + toc_size]))
+    data_pos = _aligned(HEADER.size + toc_size)
+
+    arrays = {
+        name: np.frombuffer(buffer, dtype=section["dtype"], count=section["count"], offset=data_pos + section["offset"])
+        for name, section in toc["arrays"].items()
+    }
+    return arrays, toc["attrs"]
+
+
+def encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets and UTF-8 blob of ``values``, in the layout StringColumn reads."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    if encoded:
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="u1")
+
+
+class StringColumn(Sequence):
+    """Strings stored as an offsets array and a UTF-8 blob; decoded on access."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self):
+            raise IndexError("string column position out of range")
+        return self.blob[int(self.offsets[position]):int(self.offsets[position + 1])].tobytes().decode("utf-8")
+
+    def find(self, value: str) -> int:
+        """Position of ``value`` in a column written in sorted order, or -1."""
+        position = bisect.bisect_left(self, value)
+        return position if position < len(self) and self[position] == value else -1
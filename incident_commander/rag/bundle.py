@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from typing import Dict, Any
+from .embedder import Embedder
+from .indexer import RunbookIndexer
+from .vector_store import VectorStore
+from ..config import RUNBOOKS_PATH
+from ..utils.chunker import chunker_signature
+from ..utils.files import replacing
+
+# Bump when the bundle layout changes in a way older servers cannot load.
+BUNDLE_FORMAT = 1
+BUNDLE_MANIFEST = "bundle.json"
+# Name of the index files inside a bundle, and of the pointer to the newest bundle in a build directory.
+INDEX_NAME = "faiss_index"
+LATEST = "LATEST"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_bundle(path: str) -> str:
+    """A bundle directory, or the one named by LATEST in a directory of bundles."""
+    pointer = os.path.join(path, LATEST)
+    if not os.path.exists(os.path.join(path, BUNDLE_MANIFEST)) and os.path.exists(pointer):
+        with open(pointer) as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+def build_bundle(output_dir: str, runbooks_path: str = None, embedder: Embedder = None, allow_fallback: bool = False) -> Dict[str, Any]:
+    """Embed and index every runbook into a new immutable bundle under ``output_dir``.
+
+    The bundle is assembled in a temporary directory and renamed into place, then LATEST is
+    pointed at it, so a reader never sees a partial bundle.
+    """
+    runbooks_path = runbooks_path or RUNBOOKS_PATH
+    embedder = embedder or Embedder()
+    if not embedder.is_available() and not allow_fallback:
+        raise RuntimeError(f"Embedding model {embedder.model_name} could not be loaded: {embedder.error}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=output_dir)
+    try:
+        vector_store = VectorStore(embedder=embedder, index_path=os.path.join(staging, INDEX_NAME))
+        stats = RunbookIndexer(vector_store, runbooks_path).sync()
+        if not vector_store.is_initialized():
+            raise RuntimeError(f"No runbooks found under {runbooks_path}")
+
+        files = {
+            name: {"size": os.path.getsize(os.path.join(staging, name)), "sha256": file_sha256(os.path.join(staging, name))}
+            # Lock files only coordinate writers of the staging copy.
+            for name in sorted(os.listdir(staging)) if not name.endswith(".lock")
+        }
+        content = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+        version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{content[:12]}"
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "created_at": time.time(),
+            "embedding_model": embedder.model_name,
+            "embedder": vector_store.embedder_id,
+            "dimension": vector_store.dimension,
+            "chunker": chunker_signature(),
+            "dedup": vector_store.dedup_threshold,
+            "index_type": vector_store.index_type,
+            "storage": vector_store.storage,
+            "chunks": len(vector_store),
+            "runbooks": stats["added"],
+            "files": files,
+        }
+        with open(os.path.join(staging, BUNDLE_MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+        # mkdtemp creates the directory private to the builder.
+        os.chmod(staging, 0o755)
+        os.replace(staging, os.path.join(output_dir, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    with replacing(os.path.join(output_dir, LATEST)) as tmp_path, open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    return manifest
+
+
+def verify_bundle(path: str, checksums: bool = False) -> Dict[str, Any]:
+    """Check a bundle's format and that every listed file is present with its recorded size.
+
+    ``checksums`` also re-hashes every file, which reads the whole bundle.
+    """
+    manifest_path = os.path.join(path, BUNDLE_MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Unreadable bundle manifest {manifest_path}: {e}")
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Bundle {path} has format {manifest.get('format')}, expected {BUNDLE_FORMAT}")
+
+    for name, expected in manifest["files"].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            raise ValueError(f"Bundle {path} is missing {name}")
+        if os.path.getsize(file_path) != expected["size"]:
+            raise ValueError(f"Bundle file {name} is {os.path.getsize(file_path)} bytes, expected {expected['size']}")
+        if checksums and file_sha256(file_path) != expected["sha256"]:
+            raise ValueError(f"Bundle file {name} does not match its checksum")
+
+    return manifest
+
+
+def load_bundle(path: str, vector_store: VectorStore, checksums: bool = False) -> Dict[str, Any]:
+    """Validate a bundle and load it into ``vector_store``; nothing is embedded."""
+    path = resolve_bundle(path)
+    manifest = verify_bundle(path, checksums=checksums)
+
+    if manifest["embedding_model"] != vector_store.embedder.model_name:
+        # Still served lexically; dense search needs the embedder the bundle was built with.
+        print(
+            f"Warning: Bundle {manifest['version']} was embedded with {manifest['embedding_model']}, "
+            f"not {vector_store.embedder.model_name}"
+        )
+
+    if not vector_store.load(os.path.join(path, INDEX_NAME)):
+        raise ValueError(f"Could not load the index in bundle {path}")
+    return manifest
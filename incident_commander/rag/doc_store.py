@@ -0,0 +1,113 @@
+import json
+import mmap
+import struct
+from collections.abc import Sequence
+from typing import List, Dict, Any, Callable
+import numpy as np
+from ..utils.files import replacing
+
+MAGIC = b"ICDOCS01"
+# magic, row count, then the byte position of each section: content offsets,
+# metadata offsets, content blob, metadata blob.
+HEADER = struct.Struct("<8sQQQQQ")
+
+
+def _encode_column(values: List[bytes]):
+    offsets = np.zeros(len(values) + 1, dtype="<u8")
+    if values:
+        offsets[1:] = np.cumsum([len(value) for value in values])
+    return offsets, b"".join(values)
+
+
+def write_document_store(path: str, documents: List[str], metadata: List[Dict[str, Any]]):
+    """Write documents and metadata as two offset-indexed columns, atomically replacing ``path``."""
+    content_offsets, content_blob = _encode_column([doc.encode("utf-8") for doc in documents])
+    metadata_offsets, metadata_blob = _encode_column(
+        [json.dumps(meta, separators=(",", ":")).encode("utf-8") for meta in metadata]
+    )
+
+    content_offsets_pos = HEADER.size
+    metadata_offsets_pos = content_offsets_pos + content_offsets.nbytes
+    content_blob_pos = metadata_offsets_pos + metadata_offsets.nbytes
+    metadata_blob_pos = content_blob_pos + len(content_blob)
+
+    # Readers holding an mmap of the old file keep their inode; new readers see the new one.
+    with replacing(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(documents), content_offsets_pos, metadata_offsets_pos, content_blob_pos, metadata_blob_pos))
+        f.write(content_offsets.tobytes())
+        f.write(metadata_offsets.tobytes())
+        f.write(content_blob)
+        f.write(metadata_blob)
+
+
+class _LazyColumn(Sequence):
+    def __init__(self, buffer: mmap.mmap, offsets: np.ndarray, blob_pos: int, decode: Callable[[bytes], Any]):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._blob_pos = blob_pos
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("document store row out of range")
+
+        start = self._blob_pos + int(self._offsets[row])
+        end = self._blob_pos + int(self._offsets[row + 1])
+        return self._decode(self._buffer[start:end])
+
+
+class MappedDocumentStore:
+    """Read-only, memory-mapped view of a file written by ``write_document_store``.
+
+    Opening only parses the header; rows are decoded on access, and the pages are shared
+    through the OS page cache by every process mapping the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, content_offsets_pos, metadata_offsets_pos, content_blob_pos, metadata_blob_pos = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a document store file")
+
+        content_offsets = np.frombuffer(self._buffer, dtype="<u8", count=count + 1, offset=content_offsets_pos)
+        metadata_offsets = np.frombuffer(self._buffer, dtype="<u8", count=count + 1, offset=metadata_offsets_pos)
+
+        self.documents = _LazyColumn(self._buffer, content_offsets, content_blob_pos, lambda raw: raw.decode("utf-8"))
+        self.metadata = _LazyColumn(self._buffer, metadata_offsets, metadata_blob_pos, json.loads)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+class ConcatenatedColumn(Sequence):
+    """Read-only view of several columns (one per document store segment) as a single sequence."""
+
+    def __init__(self, columns: List[Sequence]):
+        self._columns = columns
+        self._starts = np.cumsum([0] + [len(column) for column in columns])
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("document store row out of range")
+
+        segment = int(np.searchsorted(self._starts, row, side="right")) - 1
+        return self._columns[segment][row - int(self._starts[segment])]
@@ -1,44 +1,184 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
-from ..config import EMBEDDING_MODEL
+import re
+import time
+import threading
+from typing import List, Dict, Any, Tuple
+from ..config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, EMBEDDING_TUNING_PATH,
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+)
+from ..utils.ttl_cache import TTLCache
+from .hashing_embedder import HashingEmbedder
+from .inference import load_sentence_transformer, autotune, set_threads, tuning_key, load_tuning, save_tuning
+
+# Shared by every Embedder in the process so single and batched searches hit the same entries.
+query_cache = TTLCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL)
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+# Readiness states reported by Embedder.status().
+COLD, LOADING, READY, FAILED = "cold", "loading", "ready", "failed"
 
 
 class Embedder:
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, cache: TTLCache = None, backend: str = None):
         self.model_name = model_name or EMBEDDING_MODEL
+        self.backend = (backend or EMBEDDING_BACKEND).lower()
         self.model = None
+        self.batch_size = EMBEDDING_BATCH_SIZE or None
+        self.threads = EMBEDDING_THREADS or None
+        self.query_cache = cache if cache is not None else query_cache
+        self.fallback = HashingEmbedder()
+        self.state = COLD
+        self.load_seconds = None
+        self.error = None
+        self._load_lock = threading.Lock()
     
     def _load_model(self):
-        if self.model is None:
+        if self.state in (READY, FAILED):
+            return
+        
+        # Callers arriving during a background warm-up wait here for the same load.
+        with self._load_lock:
+            if self.state in (READY, FAILED):
+                return
+            
+            self.state = LOADING
+            start = time.perf_counter()
             try:
-                self.model = SentenceTransformer(self.model_name)
+                self.model = load_sentence_transformer(self.model_name, self.backend)
+                # The first encode initializes kernels and thread pools; pay for it here too.
+                self.model.encode(["warm-up"], convert_to_numpy=True)
+                self._tune()
             except Exception as e:
                 print(f"Warning: Could not load embedding model {self.model_name}: {e}")
-                print("Using dummy embeddings")
+                print(f"Using {self.fallback.identity} embeddings")
                 self.model = None
+                self.error = str(e)
+                self.state = FAILED
+            else:
+                self.state = READY
+            self.load_seconds = time.perf_counter() - start
+    
+    def _tune(self):
+        """Fill in the batch size and thread count not fixed by config, autotuning once per machine."""
+        if self.batch_size is None or self.threads is None:
+            key = tuning_key(self._model_identity())
+            tuning = load_tuning(EMBEDDING_TUNING_PATH, key) if EMBEDDING_TUNING_PATH else None
+            if tuning is None and EMBEDDING_TUNING_PATH:
+                tuning = autotune(lambda texts, batch_size: self.model.encode(texts, batch_size=batch_size))
+                save_tuning(EMBEDDING_TUNING_PATH, key, tuning)
+                print(f"Embedding autotune for {key}: {tuning}")
+            tuning = tuning or {}
+            self.batch_size = self.batch_size or tuning.get("batch_size", 32)
+            self.threads = self.threads or tuning.get("threads")
+        
+        if self.threads:
+            set_threads(self.threads)
+    
+    def warm_up(self) -> threading.Thread:
+        """Load the model on a daemon thread so the first search does not pay for it."""
+        if self.state == COLD:
+            self.state = LOADING
+        thread = threading.Thread(target=self._load_model, name="embedder-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    def is_available(self, wait: bool = True) -> bool:
+        """Whether model embeddings can be served.
+        
+        With ``wait=False`` a model that is not loaded yet reports False instead of blocking;
+        if nobody has started loading it, a background warm-up is started.
+        """
+        if not wait and self.state in (COLD, LOADING):
+            if self.state == COLD:
+                self.warm_up()
+            return False
+        self._load_model()
+        return self.model is not None
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "batch_size": self.batch_size,
+            "threads": self.threads,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+    
+    @property
+    def identity(self) -> str:
+        """Names the embedding space; vectors from different identities must not share an index."""
+        self._load_model()
+        return self._model_identity()
+    
+    def _model_identity(self) -> str:
+        if self.model is None:
+            return self.fallback.identity
+        # Quantized weights shift the vectors enough that they must not share an index with float ones.
+        return f"{self.model_name}@int8" if self.backend == "int8" else self.model_name
+    
+    @property
+    def dimension(self) -> int:
+        self._load_model()
+        if self.model is None:
+            return self.fallback.dimension
+        return self.model.get_sentence_embedding_dimension() or len(self.model.encode(["dimension"])[0])
     
     def embed(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed search queries through the shared query cache, encoding all misses in one batch."""
+        return self.encode_queries(texts)[1]
+    
+    def encode_queries(self, texts: List[str]) -> Tuple[str, List[List[float]]]:
+        """``embed_queries``, plus the identity of the space the vectors are in.
+        
+        That is the fallback's when the model is unavailable or fails to encode the batch, so
+        callers can tell the vectors cannot search an index built with the model.
+        """
         self._load_model()
         
         if self.model is None:
-            return [0.0] * 384
+            return self.fallback.identity, self.fallback.embed_batch(texts)
         
-        try:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding.tolist()
-        except Exception as e:
-            print(f"Embedding error: {e}")
-            return [0.0] * 384
+        normalized = [normalize_query(text) for text in texts]
+        embeddings = {}
+        missing = []
+        for query in dict.fromkeys(normalized):
+            cached = self.query_cache.get((self.identity, query))
+            if cached is not None:
+                embeddings[query] = cached
+            else:
+                missing.append(query)
+        
+        if missing:
+            try:
+                fresh = self.model.encode(missing, batch_size=self.batch_size, convert_to_numpy=True).tolist()
+            except Exception as e:
+                # All of the batch, so no result mixes the two embedding spaces; nothing is cached.
+                print(f"Query embedding error: {e}; using {self.fallback.identity} embeddings")
+                return self.fallback.identity, self.fallback.embed_batch(texts)
+            for query, embedding in zip(missing, fresh):
+                self.query_cache.set((self.identity, query), embedding)
+            embeddings.update(zip(missing, fresh))
+        
+        return self.identity, [embeddings[query] for query in normalized]
     
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents for indexing; raises if the model fails, so nothing is indexed with bad vectors."""
         self._load_model()
         
         if self.model is None:
-            return [[0.0] * 384] * len(texts)
+            return self.fallback.embed_batch(texts)
         
         try:
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            return embeddings.tolist()
+            embeddings = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
         except Exception as e:
-            print(f"Batch embedding error: {e}")
-            return [[0.0] * 384] * len(texts)
+            raise RuntimeError(f"Could not embed {len(texts)} documents with {self.model_name}: {e}") from e
+        return embeddings.tolist()
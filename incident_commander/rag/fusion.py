@@ -0,0 +1,33 @@
+from typing import List, Dict, Any, Callable, Hashable
+
+
+def result_key(result: Dict[str, Any]) -> Hashable:
+    if result.get("id") is not None:
+        return result["id"]
+    return (result.get("source"), result.get("content"))
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    top_k: int = 5,
+    k: int = 60,
+    key: Callable[[Dict[str, Any]], Hashable] = result_key,
+    score_key: str = "score",
+) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by summing 1 / (k + rank) for every list a result appears in.
+
+    The first occurrence of each result is kept, with the fused score stored under ``score_key``.
+    """
+    fused = {}
+    scores = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            result_id = key(result)
+            if result_id not in fused:
+                fused[result_id] = dict(result)
+                scores[result_id] = 0.0
+            scores[result_id] += 1.0 / (k + rank)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [dict(fused[result_id], **{score_key: scores[result_id]}) for result_id in ranked]
@@ -0,0 +1,61 @@
+import re
+import zlib
+from typing import List
+import numpy as np
+from ..config import FALLBACK_EMBEDDING_DIM
+
+WORD_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+class HashingEmbedder:
+    """Model-free embeddings: word and character n-grams hashed into a fixed-size signed vector.
+
+    Deterministic across processes and machines (crc32, not Python's salted ``hash``), needs
+    only NumPy, and embeds thousands of chunks per second. Term counts are damped with
+    ``log(1 + tf)`` and vectors are L2-normalized, so L2 distance ranks like cosine similarity.
+    """
+
+    VERSION = 1
+
+    def __init__(self, dimension: int = None, char_ngrams: int = 3):
+        self.dimension = dimension or FALLBACK_EMBEDDING_DIM
+        self.char_ngrams = char_ngrams
+
+    @property
+    def identity(self) -> str:
+        return f"hashing-v{self.VERSION}-{self.dimension}"
+
+    def _features(self, text: str) -> List[str]:
+        words = WORD_PATTERN.findall(text.lower())
+        features = [f"w:{word}" for word in words]
+        features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+
+        n = self.char_ngrams
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimension), dtype="float32")
+
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+
+            hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype="uint32", count=len(features))
+            # The top bit picks a sign so colliding features tend to cancel rather than add up.
+            columns = hashes % self.dimension
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+
+            counts = np.zeros(self.dimension, dtype="float32")
+            np.add.at(counts, columns, signs)
+            vectors[row] = np.sign(counts) * np.log1p(np.abs(counts))
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        return vectors.tolist()
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
@@ -0,0 +1,386 @@
+import math
+from typing import Tuple
+import numpy as np
+import faiss
+from ..utils.files import replacing
+from ..config import (
+    VECTOR_INDEX_TYPE, VECTOR_STORAGE, VECTOR_RESCORE, RESCORE_K_FACTOR,
+    IVF_NPROBE, HNSW_M, HNSW_EF_SEARCH, FILTER_BRUTE_FORCE_MAX, VECTOR_STORE_COMPACT_RATIO
+)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# How vectors are encoded: 4, 2 or 1 byte(s) per dimension, or one byte per PQ sub-quantizer.
+STORAGE_TYPES = ("float32", "float16", "int8", "pq")
+
+# Corpus sizes at which the automatic choice moves to the next index type.
+AUTO_THRESHOLDS = (
+    (10_000, "flat"),
+    (200_000, "hnsw"),
+    (2_000_000, "ivf_flat"),
+)
+
+
+def choose_index_type(num_vectors: int) -> str:
+    for limit, index_type in AUTO_THRESHOLDS:
+        if num_vectors < limit:
+            return index_type
+    return "ivf_pq"
+
+
+def resolve_index_type(index_type: str, num_vectors: int) -> str:
+    index_type = (index_type or VECTOR_INDEX_TYPE).lower()
+    if index_type == "auto":
+        return choose_index_type(num_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type '{index_type}', expected one of {INDEX_TYPES} or 'auto'")
+    return index_type
+
+
+def _nlist(num_vectors: int) -> int:
+    # ~4*sqrt(n) lists, keeping at least 39 training points per centroid as faiss recommends.
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    for m in (64, 48, 32, 24, 16, 8, 4, 2):
+        if dimension % m == 0 and dimension // m >= 4:
+            return m
+    return 1
+
+
+def resolve_storage(storage: str) -> str:
+    storage = (storage or VECTOR_STORAGE).lower()
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown vector storage '{storage}', expected one of {STORAGE_TYPES}")
+    return storage
+
+
+def _pq_codec(dimension: int, num_vectors: int) -> str:
+    # Each PQ sub-quantizer needs at least 2**nbits training points.
+    nbits = max(1, min(8, int(math.log2(num_vectors))))
+    return f"PQ{_pq_subquantizers(dimension)}x{nbits}"
+
+
+def _factory_string(index_type: str, dimension: int, num_vectors: int, storage: str = "float32") -> str:
+    codec = {
+        "float32": "Flat",
+        "float16": "SQfp16",
+        "int8": "SQ8",
+        "pq": _pq_codec(dimension, num_vectors),
+    }[storage]
+
+    if index_type == "flat":
+        return codec
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_M}" if storage == "float32" else f"HNSW{HNSW_M}_{codec.split('x')[0]}"
+
+    nlist = _nlist(num_vectors)
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},{codec}"
+    return f"IVF{nlist},{_pq_codec(dimension, num_vectors)}"
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str = None,
+    storage: str = None,
+    rescore: bool = None,
+    ids: np.ndarray = None
+) -> Tuple[faiss.Index, str]:
+    """Build, train and fill an index over ``vectors``; returns the index and its resolved type.
+
+    ``storage`` picks the vector encoding (see STORAGE_TYPES). With ``rescore`` a lossy index
+    keeps a float32 copy of the vectors and re-ranks its top candidates exactly. With ``ids``
+    searches return those ids instead of positions: IVF indexes store them in their inverted
+    lists, which supports removal in place, and other indexes are wrapped in an IndexIDMap2.
+    """
+    num_vectors, dimension = vectors.shape
+    index_type = resolve_index_type(index_type, num_vectors)
+    storage = resolve_storage(storage)
+    rescore = VECTOR_RESCORE if rescore is None else rescore
+
+    if index_type in ("ivf_flat", "ivf_pq") and num_vectors < 39:
+        print(f"Warning: {num_vectors} vectors are too few to train {index_type}, using flat index")
+        index_type = "flat"
+    if storage == "pq" and num_vectors < 256:
+        print(f"Warning: {num_vectors} vectors are too few to train pq storage, using int8")
+        storage = "int8"
+
+    factory = _factory_string(index_type, dimension, num_vectors, storage)
+    if rescore and (storage != "float32" or index_type == "ivf_pq"):
+        factory += ",RFlat"
+
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+
+    if ids is None:
+        index.add(vectors)
+    else:
+        if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+            # A hashtable direct map keeps reconstruct() and remove_ids() working by id.
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        else:
+            index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+
+    configure_index(index)
+    return index, index_type
+
+
+def _id_map(index: faiss.Index):
+    """The IndexIDMap2 holding stable ids, or None for a position-addressed index."""
+    index = faiss.downcast_index(index)
+    return index if isinstance(index, faiss.IndexIDMap2) else None
+
+
+def _inner_index(index: faiss.Index) -> faiss.Index:
+    id_map = _id_map(index)
+    return faiss.downcast_index(index if id_map is None else id_map.index)
+
+
+def _native_ivf(index: faiss.Index):
+    """The IndexIVF when it stores chunk ids in its own inverted lists, else None."""
+    index = faiss.downcast_index(index)
+    return index if isinstance(index, faiss.IndexIVF) and index.direct_map.type == faiss.DirectMap.Hashtable else None
+
+
+def _live(count: int, tombstones: np.ndarray = None) -> np.ndarray:
+    keep = np.ones(count, dtype=bool)
+    if tombstones is not None and len(tombstones):
+        keep[tombstones] = False
+    return keep
+
+
+def index_ids(index: faiss.Index, tombstones: np.ndarray = None) -> np.ndarray:
+    """Ids of the live vectors, in storage order."""
+    ivf = _native_ivf(index)
+    if ivf is not None:
+        invlists = ivf.invlists
+        lists = [
+            faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no)).copy()
+            for list_no in range(ivf.nlist) if invlists.list_size(list_no)
+        ]
+        return np.concatenate(lists).astype("int64") if lists else np.zeros(0, dtype="int64")
+
+    id_map = _id_map(index)
+    if id_map is None:
+        ids = np.arange(index.ntotal, dtype="int64")
+    else:
+        ids = faiss.vector_to_array(id_map.id_map).astype("int64")
+    return ids[_live(len(ids), tombstones)]
+
+
+def with_ids(index: faiss.Index, ids: np.ndarray) -> faiss.Index:
+    """Re-key a position-addressed index with ``ids`` (one per stored vector, in order)."""
+    vectors = reconstruct_all(index)
+    empty = faiss.clone_index(index)
+    empty.reset()
+
+    wrapped = faiss.IndexIDMap2(empty)
+    if len(vectors):
+        wrapped.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+    configure_index(wrapped)
+    return wrapped
+
+
+def index_storage(index: faiss.Index) -> Tuple[str, bool]:
+    """Return the (storage, rescore) an index was built with, as recorded in the store's meta file."""
+    refine = _refine_index(index)
+    rescore = refine is not None
+    index = _inner_index(index) if refine is None else faiss.downcast_index(refine.base_index)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # try_extract_index_ivf returns the IndexIVF base class; the codec is on the subclass.
+        index = faiss.downcast_index(ivf)
+    elif hasattr(index, "storage"):
+        index = faiss.downcast_index(index.storage)
+
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        storage = "float16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    elif isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        storage = "pq"
+    else:
+        storage = "float32"
+    return storage, rescore
+
+
+def configure_index(index: faiss.Index):
+    """Apply search-time parameters, which are not persisted by faiss.write_index."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(IVF_NPROBE, ivf.nlist)
+
+    refine = _refine_index(index)
+    if refine is not None:
+        refine.k_factor = RESCORE_K_FACTOR
+
+    base = _inner_index(index) if refine is None else faiss.downcast_index(refine.base_index)
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = HNSW_EF_SEARCH
+
+
+def filtered_search(index: faiss.Index, vectors: np.ndarray, k: int, ids: np.ndarray = None, tombstones: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Search only ``ids`` (all ids when None) so a filtered query costs about as much as an
+    unfiltered one, skipping tombstoned vectors (see ``remove_ids``)."""
+    exact = ids is not None and (len(ids) <= FILTER_BRUTE_FORCE_MAX or not _accepts_search_params(index))
+    if exact and faiss.try_extract_index_ivf(index) is None:
+        # Small selections: exact scan of just the selected vectors. HNSW graph search would
+        # otherwise wander through mostly filtered-out neighbours and return too few hits.
+        # A flat PQ index cannot take a selector at all, and would scan every code anyway.
+        # Ids resolve to their newest stored vector, so tombstones need no special handling.
+        distances, positions = faiss.knn(vectors, index.reconstruct_batch(ids), k)
+        return distances, np.where(positions >= 0, ids[positions], -1)
+
+    if tombstones is not None and len(tombstones):
+        return _search_live(index, vectors, k, ids, tombstones)
+    if ids is None:
+        return index.search(vectors, k)
+
+    selector = faiss.IDSelectorBatch(ids)
+    id_map = _id_map(index)
+    if _refine_index(index) is not None and id_map is not None:
+        # IndexIDMap2 only translates a top-level selector, but the refine stage passes the
+        # base parameters through untouched; translate ids to storage positions ourselves.
+        selector = faiss.IDSelectorTranslated(id_map.id_map, faiss.IDSelectorBatch(ids))
+    return index.search(vectors, k, params=_search_params(index, selector))
+
+
+def _search_params(index: faiss.Index, selector: faiss.IDSelector):
+    # The caller keeps ``selector`` alive for the search; faiss only holds a raw pointer.
+    ivf = faiss.try_extract_index_ivf(index)
+    refine = _refine_index(index)
+    base = _inner_index(index) if refine is None else faiss.downcast_index(refine.base_index)
+
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    elif hasattr(base, "hnsw"):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+
+    if refine is not None:
+        # The refine stage only re-scores candidates the base index returned, so it needs no selector.
+        base_params = params
+        params = faiss.IndexRefineSearchParameters(k_factor=refine.k_factor, base_index_params=base_params)
+        params.referenced_objects = [base_params]
+    return params
+
+
+def _search_live(index: faiss.Index, vectors: np.ndarray, k: int, ids: np.ndarray, tombstones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Tombstones are storage positions, and an upserted id is stored at both its old and new
+    # position, so search below the IndexIDMap2 (which would translate a selector to ids)
+    # and map the returned positions to ids here.
+    id_map = _id_map(index)
+    dead = faiss.IDSelectorBatch(tombstones)
+    selector = live = faiss.IDSelectorNot(dead)
+    if ids is not None:
+        allowed = faiss.IDSelectorBatch(ids)
+        translated = faiss.IDSelectorTranslated(id_map.id_map, allowed) if id_map is not None else allowed
+        selector = faiss.IDSelectorAnd(translated, live)
+
+    inner = index if id_map is None else faiss.downcast_index(id_map.index)
+    distances, positions = inner.search(vectors, k, params=_search_params(index, selector))
+    if id_map is None:
+        return distances, positions
+    stored = faiss.rev_swig_ptr(id_map.id_map.data(), id_map.id_map.size())
+    return distances, np.where(positions >= 0, stored[np.maximum(positions, 0)], -1)
+
+
+def _accepts_search_params(index: faiss.Index) -> bool:
+    """False for a PQ-coded flat base: IndexPQ::search rejects any SearchParameters, even
+    nested in IndexRefineSearchParameters, so it can neither skip tombstones nor filter."""
+    refine = _refine_index(index)
+    base = _inner_index(index) if refine is None else faiss.downcast_index(refine.base_index)
+    return not isinstance(base, faiss.IndexPQ)
+
+
+def _refine_index(index: faiss.Index):
+    """The exact re-scoring wrapper around a quantized index, or None."""
+    index = _inner_index(index)
+    return index if isinstance(index, faiss.IndexRefine) else None
+
+
+def read_index(path: str, mmap: bool = False, index_type: str = None) -> faiss.Index:
+    """Read an index, optionally memory-mapping its vectors/codes read-only instead of copying them."""
+    if not mmap:
+        return faiss.read_index(path)
+
+    # IVF lists are mapped by the on-disk inverted-lists hook, flat/HNSW codes by the mmap reader.
+    flags = faiss.IO_FLAG_MMAP if (index_type or "").startswith("ivf") else faiss.IO_FLAG_MMAP_IFC
+    return faiss.read_index(path, flags | faiss.IO_FLAG_READ_ONLY)
+
+
+def write_index(index: faiss.Index, path: str):
+    # Replace atomically so processes that mapped the previous file keep a consistent view.
+    with replacing(path) as tmp_path:
+        faiss.write_index(index, tmp_path)
+
+
+def copy_index(index: faiss.Index) -> faiss.Index:
+    """Deep-copy an index into owned memory; clone_index would keep viewing a mapped file."""
+    copied = faiss.deserialize_index(faiss.serialize_index(index))
+    configure_index(copied)
+    return copied
+
+
+def reconstruct_all(index: faiss.Index, tombstones: np.ndarray = None) -> np.ndarray:
+    """All live vectors, in the same order as ``index_ids``."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype="float32")
+
+    ivf = _native_ivf(index)
+    if ivf is not None:
+        return ivf.reconstruct_batch(index_ids(index))
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return _inner_index(index).reconstruct_n(0, index.ntotal)[_live(index.ntotal, tombstones)]
+
+
+def remove_ids(index: faiss.Index, ids: np.ndarray, tombstones: np.ndarray = None) -> Tuple[faiss.Index, np.ndarray]:
+    """Drop the vectors stored under ``ids``; returns the index and its tombstones.
+
+    Flat and IVF indexes remove in place. HNSW graphs cannot remove nodes, and re-scoring
+    indexes cannot remove from their exact copy, so their vectors are tombstoned by storage
+    position instead and skipped by ``filtered_search``. The index is rebuilt without them
+    once tombstones exceed VECTOR_STORE_COMPACT_RATIO of the stored vectors, or right away
+    when its search cannot skip them (a re-scored flat PQ index).
+    """
+    ids = np.asarray(ids, dtype="int64")
+    tombstones = np.zeros(0, dtype="int64") if tombstones is None else tombstones
+    if _native_ivf(index) is not None:
+        # The hashtable direct map only accepts an explicit id array.
+        index.remove_ids(faiss.IDSelectorArray(ids))
+        return index, tombstones
+    if not len(tombstones) and isinstance(_inner_index(index), faiss.IndexFlatCodes):
+        index.remove_ids(faiss.IDSelectorBatch(ids))
+        return index, tombstones
+
+    positions = np.flatnonzero(np.isin(faiss.vector_to_array(_id_map(index).id_map), ids)) if _id_map(index) is not None else ids
+    tombstones = np.union1d(tombstones, positions).astype("int64")
+    if len(tombstones) <= VECTOR_STORE_COMPACT_RATIO * index.ntotal and _accepts_search_params(index):
+        return index, tombstones
+    return compact_index(index, tombstones), np.zeros(0, dtype="int64")
+
+
+def compact_index(index: faiss.Index, tombstones: np.ndarray) -> faiss.Index:
+    """Rebuild ``index`` without its tombstoned vectors, keeping the trained quantizers.
+
+    Re-scoring indexes reconstruct the exact float32 vectors, so the re-added codes are not
+    quantized twice.
+    """
+    ids = index_ids(index, tombstones)
+    vectors = reconstruct_all(index, tombstones)
+
+    rebuilt = faiss.clone_index(index)
+    rebuilt.reset()
+    if len(vectors):
+        if _id_map(rebuilt) is None:
+            rebuilt.add(vectors)
+        else:
+            rebuilt.add_with_ids(vectors, ids)
+    configure_index(rebuilt)
+    return rebuilt
@@ -0,0 +1,131 @@
+import os
+import json
+from typing import Dict, Any
+from .vector_store import VectorStore
+from ..config import RUNBOOKS_PATH
+from ..utils.runbook_loader import scan_runbooks, file_hash, load_runbook_file
+from ..utils.chunker import chunker_signature
+from ..utils.files import file_lock, replacing
+
+
+class RunbookIndexer:
+    """Keeps a VectorStore in sync with RUNBOOKS_PATH using a per-file manifest saved next to the index."""
+
+    def __init__(self, vector_store: VectorStore, runbooks_path: str = None, manifest_path: str = None):
+        self.vector_store = vector_store
+        self.runbooks_path = runbooks_path or RUNBOOKS_PATH
+        self.manifest_path = manifest_path or f"{vector_store.index_path}.manifest.json"
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        # A manifest only describes the index it was written with.
+        if not self.vector_store.is_initialized() or not os.path.exists(self.manifest_path):
+            return {}
+
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable runbook manifest {self.manifest_path}: {e}")
+            return {}
+
+        # Chunks cut by another chunker version or budget, or deduplicated differently, are all stale.
+        if manifest.get("chunker") != chunker_signature() or manifest.get("dedup") != self.vector_store.dedup_threshold:
+            return {}
+        return manifest.get("files", {})
+
+    def save_manifest(self, files: Dict[str, Dict[str, Any]]):
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with replacing(self.manifest_path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump({
+                "runbooks_path": self.runbooks_path,
+                "chunker": chunker_signature(),
+                "dedup": self.vector_store.dedup_threshold,
+                "files": files
+            }, f, indent=2, sort_keys=True)
+
+    def sync(self, save: bool = True) -> Dict[str, int]:
+        """Re-chunk and re-embed only runbooks whose content changed since the last sync.
+
+        A saving sync holds the store's lock, so of several processes sharing the index one
+        does the work; the others find it saved, reload it and have nothing left to sync.
+        """
+        if not save:
+            return self._sync(save, reloaded=False)
+
+        with file_lock(self.vector_store.index_path):
+            # The manifest on disk describes the saved store, not one loaded before another process's save.
+            reloaded = self.vector_store.is_stale() and self.vector_store.load()
+            return self._sync(save, reloaded)
+
+    def _sync(self, save: bool, reloaded: bool) -> Dict[str, int]:
+        manifest = self.load_manifest()
+        current = scan_runbooks(self.runbooks_path)
+
+        stats = {
+            "added": 0, "updated": 0, "removed": 0, "unchanged": 0, "chunks_added": 0, "chunks_removed": 0,
+            "chunks_embedded": 0, "reloaded": int(reloaded)
+        }
+        files = {}
+        changed = []
+
+        for source, (mtime_ns, size) in current.items():
+            entry = manifest.get(source)
+            if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+                files[source] = entry
+                stats["unchanged"] += 1
+                continue
+
+            # mtime/size changed: fall back to the content hash before re-embedding.
+            digest = file_hash(os.path.join(self.runbooks_path, source))
+            if entry and entry["sha256"] == digest:
+                files[source] = dict(entry, mtime_ns=mtime_ns, size=size)
+                stats["unchanged"] += 1
+                continue
+
+            files[source] = {"mtime_ns": mtime_ns, "size": size, "sha256": digest}
+            changed.append(source)
+            stats["updated" if entry else "added"] += 1
+
+        removed = [source for source in manifest if source not in current]
+        stats["removed"] = len(removed)
+
+        dense = self.vector_store.can_search_dense()
+        if self.vector_store.is_initialized() and not dense and self.vector_store.embedder.is_available():
+            # Built with another embedder (or the fallback) and the model is loaded now: re-embed
+            # everything rather than mix spaces, even if no runbook changed.
+            print(f"Rebuilding runbook index: it was built with embedder '{self.vector_store.embedder_id}'")
+            self.vector_store.reset()
+            return self._sync(save, reloaded)
+        # The model failed to load: keep the index built with it, and index changed chunks
+        # lexically only until a sync with the model embeds them.
+        embed = dense or not self.vector_store.is_initialized()
+        if dense:
+            stats["chunks_embedded"] = self.vector_store.embed_pending()
+
+        stale = removed + [source for source in changed if source in manifest]
+        if not manifest and self.vector_store.is_initialized():
+            # Index written without a manifest: its chunks cannot be attributed to file versions.
+            stale = list({meta.get("source") for meta in self.vector_store.metadata})
+        stats["chunks_removed"] = self.vector_store.remove_sources(stale)
+
+        # One add call, so a fresh index is trained on the whole corpus rather than the first file.
+        documents, metadata = [], []
+        for source in changed:
+            file_documents, file_metadata = load_runbook_file(source, self.runbooks_path)
+            files[source]["chunks"] = len(file_documents)
+            documents.extend(file_documents)
+            metadata.extend(file_metadata)
+
+        if documents:
+            self.vector_store.add_documents(documents, metadata, embed=embed)
+            stats["chunks_added"] = len(documents)
+
+        dirty = changed or removed or stats["chunks_embedded"] or files != manifest
+        if save and dirty and self.vector_store.is_initialized():
+            self.vector_store.save()
+            self.save_manifest(files)
+
+        return stats
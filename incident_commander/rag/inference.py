@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import platform
+from typing import List, Dict, Any, Callable, Sequence
+from ..utils.files import file_lock, replacing
+
+# torch: the model as published. onnx: an ONNX Runtime export (sentence-transformers>=3.2 with
+# optimum[onnxruntime]). int8: torch dynamic quantization of the Linear layers.
+BACKENDS = ("torch", "onnx", "int8")
+
+# Representative chunk-sized texts, so tuning needs no corpus and is repeatable.
+TUNING_SAMPLE = [
+    f"## Step {i}: check {service} pods with kubectl get pods -n production, inspect logs for "
+    f"errors, and if memory usage exceeds the limit restart the deployment and scale replicas "
+    f"to {i % 5 + 2}. Verify the error rate and latency return to baseline before closing."
+    for i, service in enumerate(["auth-service", "api-service", "db-service", "cache-service"] * 16)
+]
+
+
+def load_sentence_transformer(model_name: str, backend: str = "torch") -> "SentenceTransformer":
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+    # Imported here so the app starts (on fallback embeddings) without loading torch up front.
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name, backend="onnx")
+        except (TypeError, ImportError) as e:
+            print(f"Warning: ONNX backend unavailable ({e}), using torch")
+            return SentenceTransformer(model_name)
+
+    model = SentenceTransformer(model_name, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def set_threads(threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def autotune(
+    encode: Callable[[List[str], int], Any],
+    texts: Sequence[str] = TUNING_SAMPLE,
+    batch_sizes: Sequence[int] = (8, 16, 32, 64),
+    thread_counts: Sequence[int] = None
+) -> Dict[str, Any]:
+    """Pick the thread count, then the batch size, that maximize ``encode`` throughput on this machine.
+
+    ``encode(texts, batch_size)`` is timed over ``texts`` once per candidate; threads are tuned
+    first at a mid-sized batch since they dominate on CPU.
+    """
+    cpus = os.cpu_count() or 1
+    if thread_counts is None:
+        thread_counts = sorted({cpus, max(1, cpus // 2), max(1, cpus // 4)}, reverse=True)
+
+    texts = list(texts)
+
+    def throughput(batch_size: int) -> float:
+        start = time.perf_counter()
+        encode(texts, batch_size)
+        return len(texts) / (time.perf_counter() - start)
+
+    best_threads, best_rate = thread_counts[0], 0.0
+    for threads in thread_counts:
+        set_threads(threads)
+        rate = throughput(32)
+        if rate > best_rate:
+            best_threads, best_rate = threads, rate
+    set_threads(best_threads)
+
+    best_batch, best_rate = batch_sizes[0], 0.0
+    for batch_size in batch_sizes:
+        rate = throughput(batch_size)
+        if rate > best_rate:
+            best_batch, best_rate = batch_size, rate
+
+    return {"threads": best_threads, "batch_size": best_batch, "texts_per_second": round(best_rate, 1)}
+
+
+def tuning_key(identity: str) -> str:
+    # Results only transfer between identical models on the same kind of machine.
+    return f"{identity}|{platform.machine()}|{os.cpu_count()}"
+
+
+def load_tuning(path: str, key: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def save_tuning(path: str, key: str, tuning: Dict[str, Any]):
+    # Locked so workers tuning different keys at once keep each other's entries.
+    with file_lock(path):
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[key] = tuning
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with replacing(path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
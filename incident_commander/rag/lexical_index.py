@@ -0,0 +1,190 @@
+import re
+import json
+import math
+import heapq
+from typing import List, Tuple, Iterable, Optional
+import numpy as np
+from .array_file import write_arrays, read_arrays, encode_strings, StringColumn
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_.\-]*[a-z0-9_]|[a-z0-9]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens that keep identifiers like ``pg_stat_activity`` and ``auth-service`` whole.
+
+    Hyphenated and dotted tokens additionally emit their parts, so ``auth-service`` also
+    matches a query for ``auth``.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "-" in token or "." in token:
+            tokens.extend(part for part in re.split(r"[.\-]", token) if part)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index whose document ids are VectorStore row positions.
+
+    Rows are append-only; deleted rows are tombstoned until the store is compacted.
+
+    An index loaded from disk keeps its postings in the file's arrays (memory-mapped when
+    asked), so loading does not parse them; they are copied into dicts on the first change.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = []
+        self.postings = {}
+        self.deleted = set()
+        self._total_length = 0
+        # (tokens, offsets, rows, tfs) arrays standing in for postings, doc_lengths and deleted.
+        self._frozen = None
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def _thaw(self):
+        if self._frozen is None:
+            return
+        tokens, offsets, rows, tfs = self._frozen
+        offsets, rows, tfs = offsets.tolist(), rows.tolist(), tfs.tolist()
+        self.postings = {
+            token: dict(zip(rows[start:end], tfs[start:end]))
+            for token, start, end in zip(tokens, offsets, offsets[1:])
+        }
+        self.doc_lengths = self.doc_lengths.tolist()
+        self.deleted = set(self.deleted.tolist())
+        self._frozen = None
+
+    def add(self, documents: Iterable[str]):
+        self._thaw()
+        for text in documents:
+            row = len(self.doc_lengths)
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, {})[row] = tf
+
+    def discard_rows(self, rows: Iterable[int]):
+        """Stop matching ``rows``; the row numbers of all other documents are unchanged."""
+        self._thaw()
+        removed = set(rows) - self.deleted
+        if not removed:
+            return
+
+        for token in list(self.postings):
+            docs = self.postings[token]
+            for row in removed.intersection(docs):
+                del docs[row]
+            if not docs:
+                del self.postings[token]
+
+        for row in removed:
+            self._total_length -= self.doc_lengths[row]
+            self.doc_lengths[row] = 0
+        self.deleted |= removed
+
+    def search(self, query: str, top_k: int = 5, allowed_rows: Optional[set] = None) -> List[Tuple[int, float]]:
+        if not len(self.doc_lengths):
+            return []
+
+        num_docs = len(self.doc_lengths) - len(self.deleted)
+        if num_docs <= 0:
+            return []
+        avg_length = self._total_length / num_docs or 1.0
+        if self._frozen is not None:
+            return self._search_frozen(query, top_k, allowed_rows, num_docs, avg_length)
+        scores = {}
+
+        for token in set(tokenize(query)):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+
+            idf = math.log(1.0 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for row, tf in docs.items():
+                if allowed_rows is not None and row not in allowed_rows:
+                    continue
+                norm = tf + self.k1 * (1.0 - self.b + self.b * self.doc_lengths[row] / avg_length)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1.0) / norm
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def _search_frozen(self, query: str, top_k: int, allowed_rows: Optional[set], num_docs: int, avg_length: float) -> List[Tuple[int, float]]:
+        tokens, offsets, postings_rows, postings_tfs = self._frozen
+        allowed = None if allowed_rows is None else np.fromiter(allowed_rows, dtype="int64", count=len(allowed_rows))
+        matched_rows, matched_scores = [], []
+
+        for token in set(tokenize(query)):
+            slot = tokens.find(token)
+            if slot < 0:
+                continue
+
+            start, end = int(offsets[slot]), int(offsets[slot + 1])
+            rows, tfs = postings_rows[start:end], postings_tfs[start:end].astype("float64")
+            idf = math.log(1.0 + (num_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            if allowed is not None:
+                keep = np.isin(rows, allowed)
+                rows, tfs = rows[keep], tfs[keep]
+            norm = tfs + self.k1 * (1.0 - self.b + self.b * self.doc_lengths[rows] / avg_length)
+            matched_rows.append(rows)
+            matched_scores.append(idf * tfs * (self.k1 + 1.0) / norm)
+
+        if not matched_rows:
+            return []
+        rows, inverse = np.unique(np.concatenate(matched_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores))
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def save(self, path: str):
+        if self._frozen is not None:
+            tokens, offsets, rows, tfs = self._frozen
+            token_offsets, token_blob = tokens.offsets, tokens.blob
+        else:
+            ordered = sorted(self.postings)
+            token_offsets, token_blob = encode_strings(ordered)
+            offsets = np.zeros(len(ordered) + 1, dtype="<u8")
+            offsets[1:] = np.cumsum([len(self.postings[token]) for token in ordered])
+            rows = np.fromiter((row for token in ordered for row in self.postings[token]), dtype="<u4", count=int(offsets[-1]))
+            tfs = np.fromiter((tf for token in ordered for tf in self.postings[token].values()), dtype="<u4", count=int(offsets[-1]))
+
+        write_arrays(path, {
+            "token_offsets": token_offsets,
+            "token_blob": token_blob,
+            "offsets": offsets,
+            "rows": rows,
+            "tfs": tfs,
+            "doc_lengths": np.asarray(self.doc_lengths, dtype="<u4"),
+            "deleted": np.asarray(sorted(self.deleted), dtype="<u4"),
+        }, {"k1": self.k1, "b": self.b, "total_length": self._total_length})
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "BM25Index":
+        arrays, attrs = read_arrays(path, mmap_file=mmap)
+        index = cls(k1=attrs["k1"], b=attrs["b"])
+        index.doc_lengths = arrays["doc_lengths"]
+        index.deleted = arrays["deleted"]
+        index._total_length = attrs["total_length"]
+        index._frozen = (StringColumn(arrays["token_offsets"], arrays["token_blob"]), arrays["offsets"], arrays["rows"], arrays["tfs"])
+        return index
+
+    @classmethod
+    def load_json(cls, path: str) -> "BM25Index":
+        """Load an index saved as JSON, before the array file format."""
+        with open(path) as f:
+            data = json.load(f)
+
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        index.doc_lengths = data.get("doc_lengths", [])
+        index.deleted = set(data.get("deleted", []))
+        index._total_length = sum(index.doc_lengths)
+        index.postings = {token: {row: tf for row, tf in docs} for token, docs in data.get("postings", {}).items()}
+        return index
@@ -0,0 +1,155 @@
+import json
+from typing import List, Dict, Any, Iterable, Optional
+import numpy as np
+from .array_file import write_arrays, read_arrays, encode_strings, StringColumn
+
+FILTER_FIELDS = ("category", "tags", "source")
+# Separates the field from the value in the keys of a saved index.
+KEY_SEPARATOR = "\x00"
+
+
+class MetadataIndex:
+    """Precomputed row-id sets per metadata value, used to turn search filters into FAISS selectors.
+
+    Filters map a field to a value or a list of values; a row matches a field when any of its
+    values is listed, and must match every filtered field::
+
+        {"category": "memory", "tags": ["oom", "leak"]}
+
+    Like BM25Index, a loaded index serves from the file's arrays until it is changed.
+    """
+
+    def __init__(self):
+        self.rows = {field: {} for field in FILTER_FIELDS}
+        self._count = 0
+        # (keys, offsets, rows) arrays standing in for rows; keys are "<field>\0<value>", sorted.
+        self._frozen = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _thaw(self):
+        if self._frozen is None:
+            return
+        keys, offsets, rows = self._frozen
+        offsets, rows = offsets.tolist(), rows.tolist()
+        for key, start, end in zip(keys, offsets, offsets[1:]):
+            field, value = key.split(KEY_SEPARATOR, 1)
+            self.rows[field][value] = set(rows[start:end])
+        self._frozen = None
+
+    def add(self, metadata: Iterable[Dict[str, Any]]):
+        self._thaw()
+        for meta in metadata:
+            row = self._count
+            self._count += 1
+            for field in FILTER_FIELDS:
+                for value in self._values(meta.get(field)):
+                    self.rows[field].setdefault(value, set()).add(row)
+
+    def extend_row(self, row: int, metadata: Iterable[Dict[str, Any]]):
+        """Make an existing ``row`` also match the values of ``metadata``."""
+        self._thaw()
+        for meta in metadata:
+            for field in FILTER_FIELDS:
+                for value in self._values(meta.get(field)):
+                    self.rows[field].setdefault(value, set()).add(row)
+
+    def discard_rows(self, rows: Iterable[int]):
+        """Stop matching ``rows``; the row numbers of all other entries are unchanged."""
+        self._thaw()
+        removed = set(rows)
+        if not removed:
+            return
+
+        for field, values in self.rows.items():
+            for value in list(values):
+                values[value] -= removed
+                if not values[value]:
+                    del values[value]
+
+    def select(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Return the sorted rows matching ``filters``, or None when nothing is filtered."""
+        if not filters:
+            return None
+        if self._frozen is not None:
+            return self._select_frozen(filters)
+
+        selected = None
+        for field, wanted in filters.items():
+            if field not in self.rows:
+                raise ValueError(f"Unsupported filter field '{field}', expected one of {FILTER_FIELDS}")
+
+            matched = set()
+            for value in self._values(wanted):
+                matched |= self.rows[field].get(value, set())
+
+            selected = matched if selected is None else selected & matched
+            if not selected:
+                break
+
+        return np.array(sorted(selected), dtype="int64")
+
+    def _select_frozen(self, filters: Dict[str, Any]) -> np.ndarray:
+        keys, offsets, rows = self._frozen
+        selected = None
+        for field, wanted in filters.items():
+            if field not in self.rows:
+                raise ValueError(f"Unsupported filter field '{field}', expected one of {FILTER_FIELDS}")
+
+            matched = []
+            for value in self._values(wanted):
+                slot = keys.find(f"{field}{KEY_SEPARATOR}{value}")
+                if slot >= 0:
+                    matched.append(rows[int(offsets[slot]):int(offsets[slot + 1])])
+            matched = np.unique(np.concatenate(matched)) if matched else np.zeros(0, dtype="int64")
+
+            selected = matched if selected is None else np.intersect1d(selected, matched)
+            if not len(selected):
+                break
+
+        return selected.astype("int64")
+
+    @staticmethod
+    def _values(value) -> List[str]:
+        # Compared as strings, as a saved index stores them and filters arrive from JSON requests.
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple, set)):
+            return [str(item) for item in value]
+        return [str(value)]
+
+    def save(self, path: str):
+        if self._frozen is not None:
+            keys, offsets, rows = self._frozen
+            key_offsets, key_blob = keys.offsets, keys.blob
+        else:
+            entries = sorted(
+                (f"{field}{KEY_SEPARATOR}{value}", rows) for field, values in self.rows.items() for value, rows in values.items()
+            )
+            key_offsets, key_blob = encode_strings([key for key, _ in entries])
+            offsets = np.zeros(len(entries) + 1, dtype="<u8")
+            offsets[1:] = np.cumsum([len(rows) for _, rows in entries])
+            rows = np.fromiter((row for _, rows in entries for row in sorted(rows)), dtype="<u4", count=int(offsets[-1]))
+
+        write_arrays(path, {"key_offsets": key_offsets, "key_blob": key_blob, "offsets": offsets, "rows": rows}, {"count": self._count})
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MetadataIndex":
+        arrays, attrs = read_arrays(path, mmap_file=mmap)
+        index = cls()
+        index._count = attrs["count"]
+        index._frozen = (StringColumn(arrays["key_offsets"], arrays["key_blob"]), arrays["offsets"], arrays["rows"])
+        return index
+
+    @classmethod
+    def load_json(cls, path: str) -> "MetadataIndex":
+        """Load an index saved as JSON, before the array file format."""
+        with open(path) as f:
+            data = json.load(f)
+
+        index = cls()
+        index._count = data.get("count", 0)
+        for field, values in data.get("rows", {}).items():
+            index.rows[field] = {value: set(rows) for value, rows in values.items()}
+        return index
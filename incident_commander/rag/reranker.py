@@ -0,0 +1,116 @@
+import math
+import time
+import threading
+from typing import List, Dict, Any, Tuple
+from ..config import RERANK_MODEL, RERANK_CANDIDATES, RERANK_BUDGET_MS, RERANK_MIN_SCORE
+from ..utils.tokens import TOKEN_PATTERN, count_tokens
+
+# Words that match nearly every runbook and would inflate lexical scores.
+STOP_WORDS = frozenset({"a", "an", "and", "are", "for", "in", "is", "of", "on", "or", "the", "to", "with"})
+
+# Cross-encoder pairs scored between budget checks.
+RERANK_BATCH = 4
+
+
+def query_terms(text: str) -> set:
+    return {
+        word for word in (match.group().lower() for match in TOKEN_PATTERN.finditer(text))
+        if word[0].isalnum() and word not in STOP_WORDS
+    }
+
+
+def lexical_score(query: str, content: str) -> float:
+    """Share of the query's terms that appear in ``content``."""
+    terms = query_terms(query)
+    if not terms:
+        return 0.0
+    return len(terms & query_terms(content)) / len(terms)
+
+
+class Reranker:
+    """Second retrieval stage: re-score the top-N candidates and keep those clearing a threshold.
+
+    Scores come from a cross-encoder when RERANK_MODEL is set, otherwise from query term
+    coverage. The cross-encoder loads in the background and candidates are scored in
+    batches until ``budget_ms`` runs out; unscored candidates keep their first-stage order
+    behind the scored ones and are not filtered.
+    """
+
+    def __init__(self, model_name: str = None, candidates: int = None, budget_ms: float = None, min_score: float = None):
+        self.model_name = RERANK_MODEL if model_name is None else model_name
+        self.candidates = candidates or RERANK_CANDIDATES
+        self.budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+        self.min_score = RERANK_MIN_SCORE if min_score is None else min_score
+        self.model = None
+        self.error = None
+        self._loader = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def scorer(self) -> str:
+        return self.model_name if self.model is not None else "lexical"
+
+    def warm_up(self):
+        if not self.model_name:
+            return
+
+        with self._load_lock:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load_model, name="reranker-warm-up", daemon=True)
+                self._loader.start()
+
+    def _load_model(self):
+        try:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(self.model_name)
+            model.predict([("warm-up", "warm-up")])
+            self.model = model
+        except Exception as e:
+            print(f"Warning: Could not load re-ranker {self.model_name}: {e}; using lexical re-ranking")
+            self.error = str(e)
+
+    def _score(self, query: str, contents: List[str]) -> List[float]:
+        if self.model is None:
+            return [lexical_score(query, content) for content in contents]
+
+        scores = self.model.predict([(query, content) for content in contents])
+        # Single-label cross-encoders emit logits unless the model applies a sigmoid itself.
+        return [float(score) if 0.0 <= score <= 1.0 else 1.0 / (1.0 + math.exp(-float(score))) for score in scores]
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int = 5) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Return up to ``top_k`` candidates by re-rank score, and a report of the prompt tokens saved.
+
+        The saving is measured against sending the first-stage top ``top_k`` unchanged.
+        """
+        # Lets a configured cross-encoder take over once it has loaded.
+        self.warm_up()
+
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000.0
+        scored = []
+        batch = len(candidates) if self.model is None else RERANK_BATCH
+        for i in range(0, len(candidates), batch):
+            if scored and time.perf_counter() > deadline:
+                break
+            chunk = candidates[i:i + batch]
+            scored.extend(zip(chunk, self._score(query, [candidate.get("content", "") for candidate in chunk])))
+
+        ranked = sorted(scored, key=lambda pair: pair[1], reverse=True)
+        kept = [dict(candidate, rerank_score=score) for candidate, score in ranked if score >= self.min_score]
+        kept.extend(candidates[len(scored):])
+        kept = kept[:top_k]
+
+        tokens_before = sum(count_tokens(candidate.get("content", "")) for candidate in candidates[:top_k])
+        tokens_after = sum(count_tokens(candidate.get("content", "")) for candidate in kept)
+        report = {
+            "scorer": self.scorer,
+            "candidates": len(candidates),
+            "scored": len(scored),
+            "kept": len(kept),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000.0, 2),
+            "budget_exhausted": len(scored) < len(candidates),
+            "prompt_tokens_before": tokens_before,
+            "prompt_tokens_after": tokens_after,
+            "prompt_tokens_saved": tokens_before - tokens_after,
+        }
+        return kept, report
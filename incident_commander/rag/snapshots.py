@@ -0,0 +1,107 @@
+import threading
+from typing import Dict, Any, Optional, Tuple
+from .vector_store import VectorStore
+from .indexer import RunbookIndexer
+from ..config import RUNBOOKS_PATH, RUNBOOKS_POLL_SECONDS
+from ..utils.runbook_loader import scan_runbooks
+from ..utils.files import file_lock
+
+
+class IndexSnapshots:
+    """Holds the VectorStore queries are served from and swaps in rebuilt ones atomically.
+
+    A published store is never mutated again: updates are made on a clone and published
+    as a new version. Readers take ``current()`` once per request without locking, so an
+    in-flight search keeps the snapshot it started with.
+    """
+
+    def __init__(self, vector_store: VectorStore):
+        self._snapshot = (1, vector_store)
+        self._publish_lock = threading.Lock()
+
+    def current(self) -> VectorStore:
+        return self._snapshot[1]
+
+    @property
+    def version(self) -> int:
+        return self._snapshot[0]
+
+    def snapshot(self) -> Tuple[int, VectorStore]:
+        """The current (version, store) pair, read together."""
+        return self._snapshot
+
+    def publish(self, vector_store: VectorStore) -> int:
+        with self._publish_lock:
+            version = self._snapshot[0] + 1
+            # A single reference assignment, so readers see the old pair or the new one.
+            self._snapshot = (version, vector_store)
+        return version
+
+
+class RunbookWatcher:
+    """Polls RUNBOOKS_PATH and publishes a re-synced snapshot whenever a runbook changes."""
+
+    def __init__(self, snapshots: IndexSnapshots, runbooks_path: str = None, interval: float = None):
+        self.snapshots = snapshots
+        self.runbooks_path = runbooks_path or RUNBOOKS_PATH
+        self.interval = RUNBOOKS_POLL_SECONDS if interval is None else interval
+        self.last_stats: Optional[Dict[str, int]] = None
+        self.error: Optional[str] = None
+        self._seen = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> Dict[str, int]:
+        """Sync a clone of the current snapshot with the runbooks and publish it if anything changed.
+
+        Other processes serving the same index (e.g. Gradio workers) sync under the same file
+        lock; whichever comes second reloads the index the first one saved and publishes that.
+        """
+        current = self.snapshots.current()
+        with self._refresh_lock, file_lock(current.index_path):
+            # Scanned first, so an edit made during the sync is picked up by the next poll.
+            seen = scan_runbooks(self.runbooks_path)
+            vector_store = current.clone()
+            stats = RunbookIndexer(vector_store, self.runbooks_path).sync()
+            if stats["added"] or stats["updated"] or stats["removed"] or stats["chunks_embedded"] or stats["reloaded"]:
+                self.snapshots.publish(vector_store)
+            self._seen = seen
+            self.last_stats = stats
+            return stats
+
+    def start(self, watch: bool = True):
+        """Sync once on a background thread, so startup does not wait on the embedding model,
+        then keep polling for changes if ``watch``."""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(watch,), name="runbook-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, watch: bool):
+        # The first sync runs straight away; nothing has been scanned yet, so it is never skipped.
+        delay = 0
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                # Also re-sync unchanged runbooks once the model can embed what the index lacks.
+                if scan_runbooks(self.runbooks_path) == self._seen and not self.snapshots.current().needs_embedding():
+                    continue
+                stats = self.refresh()
+                self.error = None
+                print(f"Runbook index refreshed to version {self.snapshots.version}: {stats}")
+            except Exception as e:
+                # e.g. the index was built with another embedder, or embedding failed; keep
+                # serving the last good snapshot and retry on the next poll.
+                self.error = str(e)
+                print(f"Warning: Could not refresh runbook index: {e}")
+            if not watch:
+                return
@@ -1,103 +1,741 @@
 import os
+import copy
 import json
+import uuid
 import pickle
-from typing import List, Dict, Any, Optional
+import hashlib
+import itertools
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-import faiss
-from .embedder import Embedder
-from ..config import VECTOR_STORE_PATH
+from .embedder import Embedder, LOADING
+from .embedding_cache import EmbeddingCache
+from .fusion import reciprocal_rank_fusion
+from .lexical_index import BM25Index
+from .metadata_index import MetadataIndex
+from .doc_store import MappedDocumentStore, ConcatenatedColumn, write_document_store
+from .index_factory import (
+    build_index, choose_index_type, configure_index, reconstruct_all, remove_ids, index_ids, with_ids,
+    read_index, write_index, copy_index, filtered_search, index_storage
+)
+from ..utils.minhash import MinHasher, MinHashLSH
+from ..utils.files import file_lock, read_lock, replacing
+from ..config import (
+    VECTOR_STORE_PATH, VECTOR_INDEX_TYPE, VECTOR_STORAGE, VECTOR_RESCORE, VECTOR_STORE_MMAP,
+    VECTOR_STORE_COMPACT_RATIO, EMBEDDING_CACHE_PATH, HYBRID_CANDIDATES, DEDUP_THRESHOLD
+)
+
+# Appended document store segments are merged into one once there are this many.
+MAX_SEGMENTS = 16
+DELETED = -1
+NO_TOMBSTONES = np.zeros(0, dtype='int64')
+# Default for ``embedding_cache``, so an explicit None can turn the cache off.
+DEFAULT_CACHE = object()
+
+# Store versions are unique across instances, so a clone that diverges never reuses one.
+_versions = itertools.count(1)
+
+
+def chunk_id(document: str, metadata: Dict[str, Any]) -> int:
+    """Stable 63-bit id of a chunk: its source and section, or its content when it has neither."""
+    source = metadata.get("source")
+    section = metadata.get("section")
+    if source is not None and section is not None:
+        key = f"{source}#{section}"
+    else:
+        key = f"content:{document}"
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big") & 0x7FFF_FFFF_FFFF_FFFF
 
 
 class VectorStore:
-    def __init__(self, embedder: Embedder = None, index_path: str = None):
+    def __init__(
+        self,
+        embedder: Embedder = None,
+        index_path: str = None,
+        embedding_cache: Optional[EmbeddingCache] = DEFAULT_CACHE,
+        index_type: str = None,
+        storage: str = None,
+        rescore: bool = None,
+        dedup_threshold: float = None
+    ):
         self.embedder = embedder or Embedder()
         self.index_path = index_path or VECTOR_STORE_PATH
+        self.index_type_setting = (index_type or VECTOR_INDEX_TYPE).lower()
+        self.index_type = None
+        self.storage = (storage or VECTOR_STORAGE).lower()
+        self.rescore = VECTOR_RESCORE if rescore is None else rescore
+        self.dedup_threshold = DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+        if embedding_cache is DEFAULT_CACHE:
+            embedding_cache = EmbeddingCache() if EMBEDDING_CACHE_PATH else None
+        self.embedding_cache = embedding_cache
         self.index = None
+        # Storage positions of index vectors that were deleted but not yet removed (see remove_ids).
+        self.index_tombstones = NO_TOMBSTONES
         self.documents = []
         self.metadata = []
-        self.dimension = 384
+        self.lexical_index = BM25Index()
+        self.metadata_index = MetadataIndex()
+        self.dimension = None
+        self.embedder_id = None
         self._initialized = False
+        self._mapped_path = None
+        self._clear_rows()
+    
+    def _changed(self):
+        # Results computed at an older version (e.g. cached retrievals) are stale.
+        self.version = next(_versions)
+    
+    def _clear_rows(self):
+        # Rows are append-only positions in documents/metadata and the BM25/filter indexes;
+        # deleted rows keep their position with id DELETED until the store is compacted.
+        self.row_ids = []
+        self.row_of = {}
+        # Near-duplicate chunks are not indexed; each is kept as a record under the id of the
+        # stored chunk representing it, and is indexed itself if that chunk goes away.
+        self.duplicates = {}
+        self.alias_of = {}
+        # Chunks stored while the embedding model was unavailable: searchable lexically, not
+        # in the FAISS index until embed_pending() embeds them with the model.
+        self.unembedded = set()
+        self._lsh = None
+        # Document store segments written at _saved_path, covering the first _persisted_rows rows.
+        self._segments = []
+        self._persisted_rows = 0
+        self._next_segment = 0
+        self._saved_path = None
+        # Written to meta.json by each save, to tell whether another process saved over _saved_path.
+        self._generation = None
+        self._index_dirty = True
+        self._changed()
+    
+    def __len__(self) -> int:
+        return len(self.row_of)
     
     def is_initialized(self) -> bool:
         return self._initialized and self.index is not None
     
-    def initialize(self, documents: List[str], metadata: List[Dict[str, Any]] = None):
+    def reset(self):
+        """Drop the index and documents; the next add_documents builds a fresh index."""
+        self.index = None
+        self.index_tombstones = NO_TOMBSTONES
+        self.index_type = None
+        self.documents = []
+        self.metadata = []
+        self.lexical_index = BM25Index()
+        self.metadata_index = MetadataIndex()
+        self.dimension = None
+        self.embedder_id = None
+        self._initialized = False
+        self._mapped_path = None
+        self._clear_rows()
+    
+    def initialize(self, documents: List[str], metadata: List[Dict[str, Any]] = None, ids: List[int] = None):
         if not documents:
             return
         
+        documents, metadata, ids = self._unique(documents, metadata, ids)
+        self._clear_rows()
+        documents, metadata, ids, attached = self._collapse(documents, metadata, ids)
         self.documents = documents
-        self.metadata = metadata or [{}] * len(documents)
+        self.metadata = metadata
+        self.row_ids = list(ids)
+        self.row_of = {chunk: row for row, chunk in enumerate(ids)}
+        self._mapped_path = None
+        
+        self.lexical_index = BM25Index()
+        self.lexical_index.add(documents)
+        self.metadata_index = MetadataIndex()
+        self.metadata_index.add(self.metadata)
+        for chunk in attached:
+            self._refresh_filters(chunk)
         
-        embeddings = self.embedder.embed_batch(documents)
+        embeddings = self._embed_documents(documents)
         embeddings_array = np.array(embeddings).astype('float32')
         
+        self.embedder_id = self.embedder.identity
         if len(embeddings) > 0:
             self.dimension = len(embeddings[0])
         
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(embeddings_array)
+        self._build(embeddings_array, self.index_type_setting, np.array(ids, dtype='int64'))
         
         self._initialized = True
     
-    def add_documents(self, documents: List[str], metadata: List[Dict[str, Any]] = None):
+    def _build(self, vectors: np.ndarray, index_type: str, ids: np.ndarray):
+        self.index, self.index_type = build_index(vectors, index_type, storage=self.storage, rescore=self.rescore, ids=ids)
+        self.index_tombstones = NO_TOMBSTONES
+        # Record what was actually built; tiny corpora fall back from pq to int8.
+        self.storage, self.rescore = index_storage(self.index)
+        self._index_dirty = True
+    
+    @staticmethod
+    def _unique(documents: List[str], metadata: Optional[List[Dict[str, Any]]], ids: Optional[List[int]]) -> Tuple[List[str], List[Dict[str, Any]], List[int]]:
+        metadata = metadata or [{}] * len(documents)
+        if ids is None:
+            ids = [chunk_id(document, meta) for document, meta in zip(documents, metadata)]
+        
+        # A later chunk with the same id replaces an earlier one in the same batch.
+        last = {chunk: i for i, chunk in enumerate(ids)}
+        keep = sorted(last.values())
+        return [documents[i] for i in keep], [metadata[i] for i in keep], [int(ids[i]) for i in keep]
+    
+    def add_documents(self, documents: List[str], metadata: List[Dict[str, Any]] = None, embed: bool = True) -> List[int]:
+        """Add chunks; a chunk whose id (see ``chunk_id``) is already stored replaces it."""
+        return self.upsert(documents, metadata, embed=embed)
+    
+    def upsert(self, documents: List[str], metadata: List[Dict[str, Any]] = None, ids: List[int] = None, embed: bool = True) -> List[int]:
+        """Insert or replace chunks by stable id and return their ids.
+        
+        Ids default to ``chunk_id`` of each chunk, i.e. its source and section. With
+        ``embed=False`` the chunks are only indexed lexically and left for ``embed_pending``,
+        so an index built with the model is kept while the model is unavailable.
+        """
+        if not documents:
+            return []
+        
+        documents, metadata, ids = self._unique(documents, metadata, ids)
         if not self._initialized:
-            self.initialize(documents, metadata)
-            return
+            self.initialize(documents, metadata, ids)
+            return ids
         
-        embeddings = self.embedder.embed_batch(documents)
-        embeddings_array = np.array(embeddings).astype('float32')
+        if embed:
+            self._check_embedder()
+        self._ensure_writable()
+        requested = ids
         
-        self.index.add(embeddings_array)
+        orphans = self._discard([chunk for chunk in ids if chunk in self.row_of or chunk in self.alias_of])
+        documents = documents + [record["document"] for record in orphans]
+        metadata = metadata + [record["metadata"] for record in orphans]
+        ids = ids + [record["id"] for record in orphans]
+        documents, metadata, ids, attached = self._collapse(documents, metadata, ids)
         
-        self.documents.extend(documents)
-        if metadata:
+        if documents:
+            if embed:
+                embeddings = self._embed_documents(documents)
+                embeddings_array = np.array(embeddings).astype('float32')
+                self.index.add_with_ids(embeddings_array, np.array(ids, dtype='int64'))
+                self._index_dirty = True
+            else:
+                self.unembedded.update(ids)
+            
+            start = len(self.row_ids)
+            self.documents.extend(documents)
             self.metadata.extend(metadata)
-        else:
-            self.metadata.extend([{}] * len(documents))
+            self.row_ids.extend(ids)
+            self.row_of.update((chunk, start + i) for i, chunk in enumerate(ids))
+            self.lexical_index.add(documents)
+            self.metadata_index.add(metadata)
+        for chunk in attached:
+            self._refresh_filters(chunk)
+        
+        self._maybe_rebuild_index()
+        self._changed()
+        return requested
+    
+    def delete(self, ids: List[int]) -> int:
+        """Remove the chunks stored under ``ids``; returns how many existed."""
+        if not self.is_initialized():
+            return 0
+        
+        ids = [chunk for chunk in dict.fromkeys(ids) if chunk in self.row_of or chunk in self.alias_of]
+        if not ids:
+            return 0
+        
+        self._ensure_writable()
+        orphans = self._discard(ids)
+        if orphans:
+            # Duplicates of a deleted chunk take its place.
+            self.upsert(
+                [record["document"] for record in orphans],
+                [record["metadata"] for record in orphans],
+                [record["id"] for record in orphans],
+                embed=self.can_search_dense()
+            )
+        self._changed()
+        return len(ids)
+    
+    def _lsh_index(self) -> Optional[MinHashLSH]:
+        if self.dedup_threshold <= 0:
+            return None
+        
+        if self._lsh is None:
+            # Built on first use, so loading a store does not hash the whole corpus.
+            self._lsh = MinHashLSH(MinHasher(), self.dedup_threshold)
+            for row, chunk in enumerate(self.row_ids):
+                if chunk != DELETED:
+                    self._lsh.add(chunk, self._lsh.hasher.signature(self.documents[row]))
+        return self._lsh
+    
+    def _collapse(self, documents: List[str], metadata: List[Dict[str, Any]], ids: List[int]):
+        """Attach chunks that nearly duplicate a stored (or earlier) chunk to it instead of indexing them.
+        
+        Returns the chunks to index and the ids of chunks that gained duplicates.
+        """
+        lsh = self._lsh_index()
+        if lsh is None:
+            return documents, metadata, ids, []
+        
+        kept = [], [], []
+        attached = []
+        for document, meta, chunk in zip(documents, metadata, ids):
+            signature = lsh.hasher.signature(document)
+            representative = lsh.query(signature)
+            if representative is None:
+                lsh.add(chunk, signature)
+                for column, value in zip(kept, (document, meta, chunk)):
+                    column.append(value)
+                continue
+            
+            self.duplicates.setdefault(representative, []).append({"id": chunk, "document": document, "metadata": meta})
+            self.alias_of[chunk] = representative
+            attached.append(representative)
+        
+        return kept[0], kept[1], kept[2], list(dict.fromkeys(attached))
+    
+    def _discard(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Remove stored chunks and duplicate records; returns the duplicates left without a representative."""
+        stored = [chunk for chunk in ids if chunk in self.row_of]
+        touched = set()
+        for chunk in ids:
+            representative = self.alias_of.pop(chunk, None)
+            if representative is not None:
+                records = [record for record in self.duplicates[representative] if record["id"] != chunk]
+                if records:
+                    self.duplicates[representative] = records
+                else:
+                    del self.duplicates[representative]
+                touched.add(representative)
+        
+        orphans = []
+        for chunk in stored:
+            for record in self.duplicates.pop(chunk, []):
+                del self.alias_of[record["id"]]
+                orphans.append(record)
+            if self._lsh is not None:
+                self._lsh.remove(chunk)
+        if stored:
+            self._drop(stored)
+        
+        for chunk in touched - set(stored):
+            self._refresh_filters(chunk)
+        return orphans
+    
+    def _refresh_filters(self, chunk: int):
+        # A representative matches the filter values of every chunk it stands for.
+        row = self.row_of[chunk]
+        self.metadata_index.discard_rows([row])
+        self.metadata_index.extend_row(row, [self.metadata[row]] + [record["metadata"] for record in self.duplicates.get(chunk, [])])
+    
+    def sources(self, row: int) -> List[str]:
+        """Sources of the chunk at ``row`` and of the near-duplicates it represents."""
+        records = self.duplicates.get(self.row_ids[row], [])
+        sources = [self.metadata[row].get("source")] + [record["metadata"].get("source") for record in records]
+        return [source for source in dict.fromkeys(sources) if source is not None]
+    
+    def _drop(self, ids: List[int]):
+        tombstoned = len(self.index_tombstones)
+        index, self.index_tombstones = remove_ids(self.index, np.array(ids, dtype='int64'), self.index_tombstones)
+        # New tombstones are saved with the row ids; the index file itself is unchanged.
+        if index is not self.index or len(self.index_tombstones) <= tombstoned:
+            self._index_dirty = True
+        self.index = index
+        
+        self.unembedded.difference_update(ids)
+        rows = [self.row_of.pop(chunk) for chunk in ids]
+        for row in rows:
+            self.row_ids[row] = DELETED
+        self.lexical_index.discard_rows(rows)
+        self.metadata_index.discard_rows(rows)
+        self._changed()
+    
+    def _maybe_rebuild_index(self):
+        # With "auto", retrain on the whole corpus once it outgrows the index type it was built with.
+        live = self.index.ntotal - len(self.index_tombstones)
+        if self.index_type_setting != "auto" or choose_index_type(live) == self.index_type:
+            return
+        
+        self._build(reconstruct_all(self.index, self.index_tombstones), "auto", index_ids(self.index, self.index_tombstones))
+    
+    def embed_pending(self) -> int:
+        """Embed the chunks stored with ``embed=False`` into the index; returns how many."""
+        pending = [chunk for chunk in self.unembedded if chunk in self.row_of]
+        if not pending:
+            self.unembedded = set()
+            return 0
+        
+        self._check_embedder()
+        self._ensure_writable()
+        embeddings = self._embed_documents([self.documents[self.row_of[chunk]] for chunk in pending])
+        self.index.add_with_ids(np.array(embeddings).astype('float32'), np.array(pending, dtype='int64'))
+        self._index_dirty = True
+        self.unembedded = set()
+        self._maybe_rebuild_index()
+        self._changed()
+        return len(pending)
+    
+    def needs_embedding(self) -> bool:
+        """Whether the loaded embedding model could now embed chunks this store lacks vectors for.
+        
+        True for chunks stored while the model was unavailable, and for an index built with
+        another embedder (such as the fallback). Never waits for the model to load.
+        """
+        if not self.is_initialized() or not self.embedder.is_available(wait=False):
+            return False
+        return bool(self.unembedded) or not self.can_search_dense(wait=False)
+    
+    def remove_sources(self, sources: List[str]) -> int:
+        if not self.is_initialized() or not sources:
+            return 0
+        
+        sources = set(sources)
+        return self.delete([
+            chunk for chunk, meta in zip(self.row_ids, self.metadata)
+            if chunk != DELETED and meta.get("source") in sources
+        ] + [
+            record["id"] for records in self.duplicates.values() for record in records
+            if record["metadata"].get("source") in sources
+        ])
+    
+    def clone(self) -> "VectorStore":
+        """An independent copy that can be updated while this store keeps serving searches."""
+        clone = copy.copy(self)
+        clone.documents = list(self.documents)
+        clone.metadata = list(self.metadata)
+        clone.row_ids = list(self.row_ids)
+        clone.row_of = dict(self.row_of)
+        clone._segments = list(self._segments)
+        clone.duplicates = {chunk: list(records) for chunk, records in self.duplicates.items()}
+        clone.alias_of = dict(self.alias_of)
+        clone.unembedded = set(self.unembedded)
+        clone._lsh = copy.deepcopy(self._lsh)
+        clone.lexical_index = copy.deepcopy(self.lexical_index)
+        clone.metadata_index = copy.deepcopy(self.metadata_index)
+        if clone._mapped_path is not None:
+            clone._ensure_writable()
+        elif self.index is not None:
+            clone.index = copy_index(self.index)
+        return clone
+    
+    def compact(self):
+        """Drop deleted rows and renumber the rest; the next save rewrites the document store."""
+        live = [row for row, chunk in enumerate(self.row_ids) if chunk != DELETED]
+        if len(live) == len(self.row_ids):
+            return
+        
+        # The FAISS index is addressed by chunk id, so only row-addressed structures change.
+        self._ensure_writable()
+        self.documents = [self.documents[row] for row in live]
+        self.metadata = [self.metadata[row] for row in live]
+        self.row_ids = [self.row_ids[row] for row in live]
+        self.row_of = {chunk: row for row, chunk in enumerate(self.row_ids)}
+        
+        self.lexical_index = BM25Index()
+        self.lexical_index.add(self.documents)
+        self.metadata_index = MetadataIndex()
+        self.metadata_index.add(self.metadata)
+        for chunk in self.duplicates:
+            self._refresh_filters(chunk)
+        
+        self._segments = []
+        self._persisted_rows = 0
+    
+    def _ensure_writable(self):
+        # Memory-mapped indexes and document columns are read-only; copy them into RAM before mutating.
+        if self._mapped_path is not None:
+            if self.index_type.startswith("ivf"):
+                # Mapped inverted lists only serialize as a file reference, so re-read the file into RAM.
+                self.index = read_index(f"{self._mapped_path}.index")
+                configure_index(self.index)
+            else:
+                self.index = copy_index(self.index)
+            self._mapped_path = None
+        
+        if not isinstance(self.documents, list):
+            self.documents = list(self.documents)
+            self.metadata = list(self.metadata)
+    
+    def can_search_dense(self, wait: bool = True) -> bool:
+        """Whether the embedder produces vectors in the same space the index was built from.
+        
+        With ``wait=False`` a model still warming up (started here if need be) counts as not ready.
+        """
+        if not wait and not self.embedder.is_available(wait=False) and self.embedder.state == LOADING:
+            return False
+        if self.embedder_id is None:
+            # Indexes saved before the embedder was recorded: the dimension is all we can check.
+            return self.embedder.dimension == self.dimension
+        return self.embedder.identity == self.embedder_id
+    
+    def _check_embedder(self):
+        if not self.can_search_dense():
+            raise ValueError(
+                f"Index was built with embedder '{self.embedder_id}' but the current embedder is "
+                f"'{self.embedder.identity}'; rebuild the index instead of mixing embedding spaces"
+            )
+    
+    def _embed_documents(self, documents: List[str]) -> List[List[float]]:
+        # Fallback embeddings are cheaper to recompute than to look up.
+        if self.embedding_cache is None or not self.embedder.is_available():
+            return self.embedder.embed_batch(documents)
+        
+        model = self.embedder.identity
+        embeddings = self.embedding_cache.get_many(model, documents)
+        missing = [i for i in range(len(documents)) if i not in embeddings]
+        
+        if missing:
+            texts = [documents[i] for i in missing]
+            fresh = self.embedder.embed_batch(texts)
+            self.embedding_cache.put_many(model, texts, fresh)
+            embeddings.update(zip(missing, fresh))
+        
+        return [embeddings[i] for i in range(len(documents))]
+    
+    def search(self, query: str, top_k: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        # Routed through the batch path so single and batched searches return identical results.
+        return self.search_batch([query], top_k=top_k, filters=filters)[0]
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search_batch(self, queries: List[str], top_k: int = 5, filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Embed all queries in one batch and run a single matrix search over the index.
+        
+        ``filters`` restricts results by category, tags and source (see MetadataIndex).
+        """
+        if not self.is_initialized() or not queries:
+            return [[] for _ in queries]
+        
+        rows = self.metadata_index.select(filters)
+        k = min(top_k, len(self) if rows is None else len(rows))
+        if k <= 0:
+            return [[] for _ in queries]
+        
+        self._check_embedder()
+        identity, query_embeddings = self.embedder.encode_queries(queries)
+        if identity != (self.embedder_id or self.embedder.identity):
+            # The model failed to encode these queries; its fallback's vectors cannot search this index.
+            return [self.lexical_search(query, top_k=top_k, filters=filters) for query in queries]
+        query_vectors = np.array(query_embeddings).astype('float32')
+        
+        ids = None if rows is None else np.array([self.row_ids[row] for row in rows], dtype='int64')
+        distances, labels = filtered_search(self.index, query_vectors, k, ids, self.index_tombstones)
+        
+        return [self._build_results(distances[q], labels[q]) for q in range(len(queries))]
+    
+    def lexical_search(self, query: str, top_k: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """BM25 search over the inverted index; needs no embedding model."""
         if not self.is_initialized():
             return []
         
-        query_embedding = self.embedder.embed(query)
-        query_vector = np.array([query_embedding]).astype('float32')
+        rows = self.metadata_index.select(filters)
+        allowed_rows = None if rows is None else set(rows.tolist())
         
-        distances, indices = self.index.search(query_vector, min(top_k, len(self.documents)))
+        return [
+            self._result(row, score)
+            for row, score in self.lexical_index.search(query, top_k, allowed_rows=allowed_rows)
+        ]
+    
+    def hybrid_search(self, query: str, top_k: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        return self.hybrid_search_batch([query], top_k=top_k, filters=filters)[0]
+    
+    def hybrid_search_batch(self, queries: List[str], top_k: int = 5, filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Fuse dense and BM25 rankings with reciprocal-rank fusion.
+        
+        Falls back to lexical results alone while the embedding model is warming up, so early
+        requests never wait for the model load, or when the current embedder does not match
+        the one the index was built with.
+        """
+        if not self.is_initialized():
+            return [[] for _ in queries]
         
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        lexical = [self.lexical_search(query, candidates, filters=filters) for query in queries]
+        if not self.can_search_dense(wait=False):
+            return [results[:top_k] for results in lexical]
+        
+        dense = self.search_batch(queries, top_k=candidates, filters=filters)
+        return [
+            reciprocal_rank_fusion([dense_results, lexical_results], top_k=top_k)
+            for dense_results, lexical_results in zip(dense, lexical)
+        ]
+    
+    def _build_results(self, distances: np.ndarray, labels: np.ndarray) -> List[Dict[str, Any]]:
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.documents):
-                results.append({
-                    "content": self.documents[idx],
-                    "score": float(1.0 / (1.0 + distances[0][i])),
-                    "metadata": self.metadata[idx] if idx < len(self.metadata) else {},
-                    "source": self.metadata[idx].get("source", "unknown") if idx < len(self.metadata) else "unknown"
-                })
+        for i, label in enumerate(labels):
+            row = self.row_of.get(int(label))
+            if row is not None:
+                results.append(self._result(row, float(1.0 / (1.0 + distances[i]))))
         
         return results
     
+    def _result(self, row: int, score: float) -> Dict[str, Any]:
+        metadata = self.metadata[row] if row < len(self.metadata) else {}
+        return {
+            "id": self.row_ids[row],
+            "content": self.documents[row],
+            "score": score,
+            "metadata": metadata,
+            "source": metadata.get("source", "unknown"),
+            "sources": self.sources(row)
+        }
+    
     def save(self, path: str = None):
+        """Persist the store, appending only rows added since the last save to the same path.
+        
+        Documents are kept in append-only segments (``<path>.docs.<n>.bin``) listed in
+        ``<path>.rows.json`` along with each row's chunk id, so an upsert or delete writes one
+        small segment plus the id list. Once deleted rows exceed VECTOR_STORE_COMPACT_RATIO
+        or MAX_SEGMENTS segments exist, the store is compacted into a single segment.
+        
+        Saves hold ``<path>.lock``, so processes sharing a path write one at a time. A store
+        saved over by another process since this one last loaded or saved it is written in full.
+        """
         save_path = path or self.index_path
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        directory = os.path.dirname(save_path)
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(save_path):
+            self._save(save_path)
+    
+    def _save(self, save_path: str):
+        directory = os.path.dirname(save_path)
+        own = save_path == self._saved_path and not self.is_stale(save_path)
+        if own:
+            previous = self._segments
+        else:
+            # Replace whatever store is at the path, without reusing its segment names.
+            layout = self._read_layout(save_path)
+            previous = layout.get("segments", [])
+            self._next_segment = max(self._next_segment, layout.get("next_segment", 0))
+        
+        deleted = len(self.row_ids) - len(self.row_of)
+        full = (
+            not own
+            or not self._segments
+            or len(self._segments) >= MAX_SEGMENTS
+            or deleted > VECTOR_STORE_COMPACT_RATIO * max(len(self.row_ids), 1)
+        )
+        if full:
+            self.compact()
+        
+        segments = [] if full else list(self._segments)
+        start = 0 if full else self._persisted_rows
+        if start < len(self.row_ids) or not segments:
+            name = f"{os.path.basename(save_path)}.docs.{self._next_segment}.bin"
+            self._next_segment += 1
+            write_document_store(os.path.join(directory, name), self.documents[start:], self.metadata[start:])
+            segments.append({"file": name, "rows": len(self.row_ids) - start})
+        
+        if self._index_dirty or not own:
+            write_index(self.index, f"{save_path}.index")
+        self.lexical_index.save(f"{save_path}.bm25.bin")
+        self.metadata_index.save(f"{save_path}.filters.bin")
         
-        faiss.write_index(self.index, f"{save_path}.index")
+        with replacing(f"{save_path}.duplicates.json") as tmp_path, open(tmp_path, "w") as f:
+            json.dump({str(chunk): records for chunk, records in self.duplicates.items()}, f, separators=(",", ":"))
         
-        with open(f"{save_path}.docs.pkl", "wb") as f:
-            pickle.dump({"documents": self.documents, "metadata": self.metadata}, f)
+        with replacing(f"{save_path}.rows.json") as tmp_path, open(tmp_path, "w") as f:
+            json.dump({
+                "segments": segments,
+                "next_segment": self._next_segment,
+                "ids": self.row_ids,
+                "tombstones": self.index_tombstones.tolist(),
+                "unembedded": sorted(self.unembedded),
+            }, f, separators=(",", ":"))
+        
+        generation = uuid.uuid4().hex
+        with replacing(f"{save_path}.meta.json") as tmp_path, open(tmp_path, "w") as f:
+            json.dump({
+                "index_type": self.index_type,
+                "storage": self.storage,
+                "rescore": self.rescore,
+                "embedder": self.embedder_id,
+                "dimension": self.dimension,
+                "ntotal": self.index.ntotal,
+                "generation": generation
+            }, f, indent=2)
+        
+        # Processes still mapping a replaced segment keep reading it through their open mapping.
+        stale_files = [os.path.join(directory, segment["file"]) for segment in previous if segment not in segments]
+        # Lexical and filter indexes saved as JSON, before the array file format.
+        stale_files += [f"{save_path}.bm25.json", f"{save_path}.filters.json"]
+        for stale_file in stale_files:
+            try:
+                os.remove(stale_file)
+            except OSError:
+                pass
+        
+        self._segments = segments
+        self._persisted_rows = len(self.row_ids)
+        self._saved_path = save_path
+        self._generation = generation
+        self._index_dirty = False
+    
+    def _read_layout(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(f"{path}.rows.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def is_stale(self, path: str = None) -> bool:
+        """Whether the store at ``path`` was saved by someone else since this store loaded or saved it."""
+        path = path or self.index_path
+        try:
+            with open(f"{path}.meta.json") as f:
+                generation = json.load(f).get("generation")
+        except (OSError, ValueError):
+            return False
+        return generation is not None and (path != self._saved_path or generation != self._generation)
     
-    def load(self, path: str = None) -> bool:
+    def load(self, path: str = None, mmap: bool = None) -> bool:
         load_path = path or self.index_path
-        
+        mmap = VECTOR_STORE_MMAP if mmap is None else mmap
+        # Not while another process is part way through saving over it.
+        with read_lock(load_path):
+            return self._load(load_path, mmap)
+    
+    def _load(self, load_path: str, mmap: bool) -> bool:
         try:
             if os.path.exists(f"{load_path}.index"):
-                self.index = faiss.read_index(f"{load_path}.index")
+                index_meta = {}
+                if os.path.exists(f"{load_path}.meta.json"):
+                    with open(f"{load_path}.meta.json") as f:
+                        index_meta = json.load(f)
+                
+                self._clear_rows()
+                self.index_tombstones = NO_TOMBSTONES
+                # Stores saved before chunk ids are re-keyed on load, which needs the index in RAM.
+                segmented = os.path.exists(f"{load_path}.rows.json")
+                # Indexes saved before index types were configurable are always flat.
+                self.index_type = index_meta.get("index_type", "flat")
+                self.index = read_index(f"{load_path}.index", mmap=mmap and segmented, index_type=self.index_type)
+                configure_index(self.index)
+                self.storage = index_meta.get("storage", "float32")
+                self.rescore = index_meta.get("rescore", False)
+                self.embedder_id = index_meta.get("embedder")
                 
-                if os.path.exists(f"{load_path}.docs.pkl"):
-                    with open(f"{load_path}.docs.pkl", "rb") as f:
-                        data = pickle.load(f)
-                        self.documents = data.get("documents", [])
-                        self.metadata = data.get("metadata", [])
+                if segmented:
+                    self._load_segments(load_path, mmap, index_meta.get("generation"))
+                else:
+                    self._load_legacy_documents(load_path)
                 
+                if os.path.exists(f"{load_path}.bm25.bin"):
+                    self.lexical_index = BM25Index.load(f"{load_path}.bm25.bin", mmap=mmap)
+                elif os.path.exists(f"{load_path}.bm25.json"):
+                    self.lexical_index = BM25Index.load_json(f"{load_path}.bm25.json")
+                else:
+                    self.lexical_index = BM25Index()
+                    self.lexical_index.add(self.documents)
+                
+                if os.path.exists(f"{load_path}.filters.bin"):
+                    self.metadata_index = MetadataIndex.load(f"{load_path}.filters.bin", mmap=mmap)
+                elif os.path.exists(f"{load_path}.filters.json"):
+                    self.metadata_index = MetadataIndex.load_json(f"{load_path}.filters.json")
+                else:
+                    self.metadata_index = MetadataIndex()
+                    self.metadata_index.add(self.metadata)
+                
+                self.row_of = {chunk: row for row, chunk in enumerate(self.row_ids) if chunk != DELETED}
+                if os.path.exists(f"{load_path}.duplicates.json"):
+                    with open(f"{load_path}.duplicates.json") as f:
+                        self.duplicates = {int(chunk): records for chunk, records in json.load(f).items()}
+                    self.alias_of = {record["id"]: chunk for chunk, records in self.duplicates.items() for record in records}
+                self._mapped_path = load_path if mmap and self._saved_path else None
                 self.dimension = self.index.d
                 self._initialized = True
                 return True
@@ -105,3 +743,52 @@ class VectorStore:
             print(f"Error loading vector store: {e}")
         
         return False
+    
+    def _load_segments(self, load_path: str, mmap: bool, generation: Optional[str]):
+        with open(f"{load_path}.rows.json") as f:
+            layout = json.load(f)
+        
+        directory = os.path.dirname(load_path)
+        stores = [MappedDocumentStore(os.path.join(directory, segment["file"])) for segment in layout["segments"]]
+        if mmap:
+            self.documents = ConcatenatedColumn([store.documents for store in stores])
+            self.metadata = ConcatenatedColumn([store.metadata for store in stores])
+        else:
+            self.documents = [document for store in stores for document in store.documents]
+            self.metadata = [meta for store in stores for meta in store.metadata]
+        
+        self.row_ids = layout["ids"]
+        self.index_tombstones = np.array(layout.get("tombstones", []), dtype='int64')
+        self.unembedded = set(layout.get("unembedded", []))
+        self._segments = layout["segments"]
+        self._persisted_rows = len(self.row_ids)
+        self._next_segment = layout.get("next_segment", len(self._segments))
+        self._saved_path = load_path
+        self._generation = generation
+        self._index_dirty = False
+    
+    def _load_legacy_documents(self, load_path: str):
+        if os.path.exists(f"{load_path}.docs.bin"):
+            # Single-file document store written before segments and chunk ids.
+            store = MappedDocumentStore(f"{load_path}.docs.bin")
+            self.documents = list(store.documents)
+            self.metadata = list(store.metadata)
+        elif os.path.exists(f"{load_path}.docs.pkl"):
+            # Document stores written before the columnar format.
+            with open(f"{load_path}.docs.pkl", "rb") as f:
+                data = pickle.load(f)
+                self.documents = data.get("documents", [])
+                self.metadata = data.get("metadata", [])
+        
+        ids = []
+        seen = set()
+        for row, (document, meta) in enumerate(zip(self.documents, self.metadata)):
+            chunk = chunk_id(document, meta)
+            if chunk in seen:
+                chunk = chunk_id(f"{row}:{document}", {})
+            seen.add(chunk)
+            ids.append(chunk)
+        
+        # Position-addressed index: re-key it by chunk id; the next save writes the new layout.
+        self.row_ids = ids
+        self.index = with_ids(self.index, np.array(ids, dtype='int64'))
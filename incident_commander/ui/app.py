@@ -1,12 +1,16 @@
 import json
 import time
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterator, Tuple
 
 import gradio as gr
 
 from ..mcp_clients.rag import MCPRAG
 from ..mcp_clients.sandbox import MCPSandbox
 from ..orchestrator import AgentOrchestrator
+from ..config import RUNBOOKS_WATCH, VECTOR_BUNDLE_PATH, VECTOR_BUNDLE_CHECKSUMS
+from ..rag.bundle import load_bundle
+from ..rag.embedder import Embedder
+from ..rag.snapshots import IndexSnapshots, RunbookWatcher
 from ..rag.vector_store import VectorStore
 
 
@@ -17,24 +21,45 @@ class IncidentCommanderUI:
         self.current_incident_response = None
         self.current_execution_results = None
         self.current_alert = None
+        self.snapshots = None
+        self.watcher = None
+        self.bundle = None
+
+        # Load the embedding model in the background; retrieval is lexical until it is ready.
+        self.embedder = Embedder()
+        self.embedder.warm_up()
 
         self._initialize_vector_store()
 
     def _initialize_vector_store(self):
         try:
-            vector_store = VectorStore()
-
-            if not vector_store.load():
-                from ..utils.runbook_loader import load_runbooks
-
-                documents, metadata = load_runbooks()
-                if documents:
-                    vector_store.initialize(documents, metadata)
-                    vector_store.save()
+            vector_store = VectorStore(embedder=self.embedder)
+            if VECTOR_BUNDLE_PATH:
+                # Prebuilt by `python -m incident_commander.build_index`; served as-is.
+                self.bundle = load_bundle(VECTOR_BUNDLE_PATH, vector_store, checksums=VECTOR_BUNDLE_CHECKSUMS)
+                print(f"Loaded runbook index bundle {self.bundle['version']} ({self.bundle['chunks']} chunks)")
+            else:
+                vector_store.load()
+            self.snapshots = IndexSnapshots(vector_store)
 
-            self.orchestrator.rag_tool = MCPRAG(vector_store)
+            rag_tool = MCPRAG(self.snapshots)
+            self.orchestrator.rag_tool = rag_tool
+            self.orchestrator.analyst.rag_tool = rag_tool
         except Exception as e:
             print(f"Warning: Could not initialize vector store: {e}")
+            return
+
+        if self.bundle is not None:
+            return
+
+        # Syncs run on a copy of the index that is swapped in when done, so queries never wait on
+        # them; the first one too, which would otherwise block startup on the model warm-up.
+        self.watcher = RunbookWatcher(self.snapshots)
+        self.watcher.start(watch=RUNBOOKS_WATCH)
+
+    @property
+    def vector_store(self):
+        return self.snapshots.current() if self.snapshots is not None else None
 
     def create_ui(self) -> gr.Blocks:
         app = gr.Blocks(title="🚨 Incident Commander")
@@ -45,6 +70,13 @@ class IncidentCommanderUI:
             gr.Markdown(
                 "AI-powered incident detection, diagnosis, planning, and execution"
             )
+            readiness = gr.Markdown()
+            app.load(fn=self._readiness_summary, outputs=[readiness])
+
+            # Exposed as /api/health for load balancers and deploy checks.
+            health_json = gr.JSON(visible=False)
+            health_btn = gr.Button(visible=False)
+            health_btn.click(fn=self._health, outputs=[health_json], api_name="health")
 
             self.incident_state = gr.State(value=None)
             self.plan_state = gr.State(value=None)
@@ -258,6 +290,40 @@ class IncidentCommanderUI:
             outputs=[postmortem_text],
         )
 
+    def _health(self) -> Dict[str, Any]:
+        embedder = self.embedder.status()
+        vector_store = self.vector_store
+        initialized = vector_store is not None and vector_store.is_initialized()
+        dense_search = initialized and vector_store.can_search_dense(wait=False)
+        return {
+            "ready": embedder["state"] == "ready" and dense_search,
+            "embedder": embedder,
+            "vector_store": {
+                "initialized": initialized,
+                "dense_search": dense_search,
+                "embedder": vector_store.embedder_id if vector_store is not None else None,
+                "chunks": len(vector_store) if vector_store is not None else 0,
+                "index_type": vector_store.index_type if vector_store is not None else None,
+                "version": self.snapshots.version if self.snapshots is not None else None,
+                "bundle": self.bundle["version"] if self.bundle is not None else None,
+                "last_refresh_error": self.watcher.error if self.watcher is not None else None,
+            },
+            "retrieval_cache": self.orchestrator.rag_tool.cache.stats(),
+            "plan_cache": self.orchestrator.planner.cache.stats(),
+            "plan_single_flight": self.orchestrator.planner.flights.stats(),
+        }
+
+    def _readiness_summary(self) -> str:
+        health = self._health()
+        state = health["embedder"]["state"]
+        if health["ready"]:
+            return f"🟢 Retrieval ready ({health['vector_store']['chunks']} runbook chunks)"
+        if state == "loading":
+            return "🟡 Embedding model warming up, using keyword retrieval"
+        if health["vector_store"]["dense_search"]:
+            return "🟠 Embedding model unavailable, using hashed n-gram embeddings"
+        return "🔴 Embedding model unavailable, using keyword retrieval"
+
     # Event handler methods
     def _simulate_incident(self) -> Tuple[list, str, gr.Button, Dict]:
         services = ["auth-service", "api-service", "db-service", "cache-service"]
@@ -298,14 +364,20 @@ class IncidentCommanderUI:
 
         return alerts, summary, gr.Button(visible=True), alert
 
-    def _analyze_incident(self, alert: Dict) -> Tuple[str, Dict]:
+    def _analyze_incident(self, alert: Dict) -> Iterator[Tuple[str, Dict]]:
         if not alert:
-            return (
+            yield (
                 "### ❌ No alert available. Please create or simulate an incident first.",
                 None,
             )
+            return
+
+        # Each streamed step updates the Plan tab before generation finishes.
+        for incident_response in self.orchestrator.process_incident_stream(alert):
+            if incident_response["status"] == "planning":
+                steps = incident_response["plan"]["steps"]
+                yield f"### ⏳ Generating plan\n\n{len(steps)} steps so far, latest: {steps[-1].get('action', '')}", incident_response
 
-        incident_response = self.orchestrator.process_incident(alert)
         self.current_incident_response = incident_response
         self.current_alert = alert
 
@@ -322,7 +394,7 @@ class IncidentCommanderUI:
 **Requires Approval:** {incident_response["audit"].get("requires_manual_approval", False)}
 """
 
-        return summary, incident_response
+        yield summary, incident_response
 
     def _load_plan(
         self, incident_response: Dict
@@ -335,6 +407,16 @@ class IncidentCommanderUI:
         context = incident_response.get("context_bundle", {})
         audit = incident_response.get("audit", {})
 
+        if incident_response.get("status") == "planning":
+            steps = plan.get("steps", [])
+            flagged = [audit_step for audit_step in audit.get("step_audits", []) if audit_step["warnings"]]
+            summary = f"### Plan Summary\n\n⏳ Generating plan: {len(steps)} steps so far, {len(flagged)} flagged by the auditor\n"
+            risk_text = "### Risk Assessment\n\n" + "".join(
+                f"- Step {audit_step['step_id']}: {'; '.join(audit_step['warnings'])}\n" for audit_step in flagged
+            )
+            # Nothing to approve until the complete plan has been audited.
+            return plan, summary, "### Reasoning\n\nPending", "### Runbook References", risk_text, audit, None
+
         # Format plan summary
         summary = f"""
 ### Plan Summary
@@ -344,6 +426,11 @@ class IncidentCommanderUI:
 **Total Steps:** {len(plan.get("steps", []))}
 **Total Risk:** {plan.get("total_risk_score", 0.0):.2f}
 """
+        plan_cache = plan.get("plan_cache")
+        if plan_cache and plan_cache["hit"]:
+            summary += f"**Plan cache:** reused a plan from {plan_cache['age_seconds']:.0f}s ago, saving {plan_cache['seconds_saved']:.1f}s of generation\n"
+        elif plan_cache and plan_cache.get("coalesced"):
+            summary += "**Plan cache:** shared the plan being generated for an identical concurrent incident\n"
 
         # Format reasoning
         reasoning = (
@@ -356,6 +443,12 @@ class IncidentCommanderUI:
         for i, snippet in enumerate(runbook_snippets[:3], 1):
             runbook_text += f"**{i}. {snippet.get('source', 'Unknown')}**\n"
             runbook_text += f"{snippet.get('content', '')[:200]}...\n\n"
+        rerank = context.get("rerank")
+        if rerank:
+            runbook_text += (
+                f"_Re-ranked {rerank['candidates']} candidates with {rerank['scorer']} in {rerank['elapsed_ms']:.0f} ms; "
+                f"kept {rerank['kept']}, saving {rerank['prompt_tokens_saved']} prompt tokens._\n"
+            )
 
         # Format risk assessment
         risk_text = f"""
@@ -1,3 +1,4 @@
 from .runbook_loader import load_runbooks
+from .ttl_cache import TTLCache
 
-__all__ = ["load_runbooks"]
+__all__ = ["load_runbooks", "TTLCache"]
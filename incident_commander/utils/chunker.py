@@ -0,0 +1,149 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+from ..config import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS
+from .tokens import count_tokens, tail_tokens, split_tokens
+
+# Bump when chunk boundaries change so indexed runbooks are re-chunked.
+CHUNKER_VERSION = 2
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+HEADING, CODE, TEXT = "heading", "code", "text"
+
+
+def chunker_signature(max_tokens: int = None, overlap_tokens: int = None, min_tokens: int = None) -> str:
+    """Identifies the chunk boundaries a configuration produces, for index manifests."""
+    return (
+        f"v{CHUNKER_VERSION}-{max_tokens or CHUNK_MAX_TOKENS}-"
+        f"{CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens}-"
+        f"{CHUNK_MIN_TOKENS if min_tokens is None else min_tokens}"
+    )
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Tuple[str, Optional[int], str]]:
+    """Split markdown lines into (kind, heading level, text) blocks.
+
+    Headings are single blocks, fenced code blocks are kept whole including their blank
+    lines, and everything else is grouped into blank-line separated paragraphs.
+    """
+    buffer = []
+    fence = None
+
+    for line in lines:
+        line = line.rstrip("\n")
+
+        if fence:
+            buffer.append(line)
+            if line.strip().startswith(fence):
+                yield CODE, None, "\n".join(buffer)
+                buffer = []
+                fence = None
+            continue
+
+        fence_match = FENCE_PATTERN.match(line)
+        heading_match = HEADING_PATTERN.match(line)
+        if fence_match or heading_match or not line.strip():
+            if buffer:
+                yield TEXT, None, "\n".join(buffer)
+                buffer = []
+
+        if fence_match:
+            fence = fence_match.group(1)
+            buffer = [line]
+        elif heading_match:
+            yield HEADING, len(heading_match.group(1)), line.strip()
+        elif line.strip():
+            buffer.append(line)
+
+    if buffer:
+        # An unterminated fence still holds code.
+        yield (CODE if fence else TEXT), None, "\n".join(buffer)
+
+
+def _common_prefix(a: List[str], b: List[str]) -> List[str]:
+    prefix = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix.append(x)
+    return prefix
+
+
+def iter_chunks(
+    lines: Iterable[str],
+    max_tokens: int = None,
+    overlap_tokens: int = None,
+    min_tokens: int = None
+) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (chunk text, heading path) pairs from markdown lines.
+
+    Chunks start at headings and hold at most ``max_tokens`` tokens; a code block longer than
+    that becomes a chunk of its own rather than being cut. Sections smaller than
+    ``min_tokens`` (e.g. a bare ``## Risk Level``) are merged into the following section.
+    When a section is split for size, the next chunk repeats the last ``overlap_tokens``
+    tokens of prose. The heading path is the list of headings shared by everything in the chunk.
+    """
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    min_tokens = CHUNK_MIN_TOKENS if min_tokens is None else min_tokens
+    # Overlap may never fill a chunk on its own.
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    path = []           # (level, title) of the headings enclosing the current line
+    parts = []          # (kind, text) blocks of the chunk being built
+    tokens = 0
+    fresh = False       # whether the chunk holds more than carried-over overlap
+    chunk_path = []
+
+    def titles() -> List[str]:
+        return [title for _, title in path]
+
+    def emit():
+        return "\n\n".join(text for _, text in parts), list(chunk_path)
+
+    for kind, level, text in iter_blocks(lines):
+        if kind == HEADING:
+            if fresh and tokens >= min_tokens:
+                yield emit()
+                fresh = False
+            if not fresh:
+                # Overlap never crosses into a new section.
+                parts, tokens = [], 0
+
+            while path and path[-1][0] >= level:
+                path.pop()
+            path.append((level, text.lstrip("#").strip()))
+            chunk_path = _common_prefix(chunk_path, titles()) if fresh else titles()
+
+        pieces = [text]
+        size = count_tokens(text)
+        if kind == TEXT and size > max_tokens:
+            pieces = list(split_tokens(text, max_tokens - overlap_tokens))
+
+        for piece in pieces:
+            size = count_tokens(piece)
+            if fresh and tokens + size > max_tokens:
+                # Headings with nothing under them yet move on with their content.
+                moved = []
+                while parts and parts[-1][0] == HEADING:
+                    moved.insert(0, parts.pop())
+
+                carry = ""
+                if parts:
+                    yield emit()
+                    # Carry prose context into the continuation; a cut code block would be noise.
+                    if overlap_tokens and kind != HEADING and not moved and parts[-1][0] == TEXT:
+                        carry = tail_tokens(parts[-1][1], overlap_tokens)
+
+                parts = ([(TEXT, carry)] if carry else []) + moved
+                tokens = sum(count_tokens(text) for _, text in parts)
+                fresh = bool(moved)
+                chunk_path = titles()
+
+            parts.append((kind, piece))
+            tokens += size
+            fresh = True
+
+    if fresh:
+        yield emit()
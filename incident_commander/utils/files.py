@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only serializes threads of this process.
+    fcntl = None
+
+
+@contextmanager
+def replacing(path: str) -> Iterator[str]:
+    """Yield a unique temporary path next to ``path`` that replaces it atomically on success.
+
+    Each writer gets its own temporary file, so processes saving the same file concurrently
+    never write into each other's. The temporary file is removed if the block raises.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        # mkstemp creates the file private to its owner.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileLock:
+    """Exclusive lock on ``<path>.lock``, shared by the threads of this process and by other processes.
+
+    Reentrant within a thread, so a save taken under a sync's lock does not deadlock.
+    """
+
+    def __init__(self, path: str):
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                directory = os.path.dirname(self.lock_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.lock_path, "a")
+                if fcntl is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            # Closing the file releases the flock.
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_locks: Dict[str, FileLock] = {}
+_locks_lock = threading.Lock()
+
+
+def file_lock(path: str) -> FileLock:
+    """The process-wide FileLock for ``path``; use it as a context manager."""
+    key = os.path.abspath(path)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = FileLock(key)
+        return lock
+
+
+@contextmanager
+def read_lock(path: str) -> Iterator[None]:
+    """Hold ``path``'s FileLock while reading it, unless its directory is read-only and so has no writers."""
+    if not os.access(os.path.dirname(path) or ".", os.W_OK):
+        yield
+        return
+    with file_lock(path):
+        yield
@@ -0,0 +1,67 @@
+import re
+import json
+from typing import Any, Dict, List
+
+
+class JsonArrayStream:
+    """Incrementally extract the objects of one array from a JSON document arriving in pieces.
+
+    ``feed`` returns each element of the array under ``key`` as soon as its closing brace
+    arrives, so e.g. plan steps can be shown while the rest of the plan is still being
+    generated. Each character is scanned once; elements that are not valid JSON on their own
+    are skipped and left to whoever parses the complete document.
+    """
+
+    def __init__(self, key: str):
+        self.key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.buffer = ""
+        self.pos = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.start = None
+        self.closed = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.buffer += text
+        if self.pos is None:
+            match = self.key_pattern.search(self.buffer)
+            if match is None:
+                return []
+            self.pos = match.end()
+
+        items = []
+        buffer = self.buffer
+        while self.pos < len(buffer) and not self.closed:
+            char = buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.depth == 0 and char == "{":
+                    self.start = self.pos
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth < 0:
+                    # The array itself closed.
+                    self.closed = True
+                elif self.depth == 0 and char == "}" and self.start is not None:
+                    try:
+                        items.append(json.loads(buffer[self.start:self.pos + 1]))
+                    except ValueError:
+                        pass
+                    self.start = None
+            self.pos += 1
+
+        return items
+
+    @property
+    def text(self) -> str:
+        return self.buffer
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class ConcurrencyLimiter:
+    """An asyncio semaphore that can be shared by event loops running in different threads.
+
+    ``asyncio.Semaphore`` only counts the tasks of one loop, so each loop would get the full
+    limit. Here waiters queue in FIFO order across loops, and a released slot is handed to the
+    next waiter on its own loop, so no thread ever blocks waiting for one.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = (loop, waiter) in self._waiters
+                if queued:
+                    self._waiters.remove((loop, waiter))
+            if not queued and not waiter.cancelled():
+                # The slot was handed over just before the cancellation; pass it on.
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop.is_closed():
+                    continue
+                # The slot moves to the waiter, so in_flight is unchanged.
+                loop.call_soon_threadsafe(self._wake, waiter)
+                return
+            self.in_flight -= 1
+
+    def _wake(self, waiter: asyncio.Future):
+        if waiter.cancelled():
+            # Its task was cancelled after the slot was handed to it.
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
@@ -0,0 +1,88 @@
+import zlib
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+import numpy as np
+from .tokens import TOKEN_PATTERN
+
+# Mersenne prime modulus for the universal hash family h(x) = (a * x + b) mod p.
+_PRIME = (1 << 61) - 1
+
+
+class MinHasher:
+    """MinHash signatures of word shingles; equal positions estimate Jaccard similarity."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Kept below 2**31 so a * x + b stays inside uint64 for 32-bit shingle hashes.
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[int]:
+        words = [match.group().lower() for match in TOKEN_PATTERN.finditer(text)]
+        n = min(self.shingle_size, len(words)) or 1
+        return {
+            zlib.crc32(" ".join(words[i:i + n]).encode("utf-8"))
+            for i in range(max(len(words) - n + 1, 1))
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(self.shingles(text), dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a == b))
+
+
+class MinHashLSH:
+    """Banded locality-sensitive index over MinHash signatures for near-duplicate lookup.
+
+    Signatures are cut into ``bands`` bands; keys sharing any whole band are candidates and
+    are confirmed against ``threshold`` on the full signature.
+    """
+
+    def __init__(self, hasher: MinHasher, threshold: float, bands: int = 8):
+        if hasher.num_perm % bands:
+            raise ValueError(f"num_perm ({hasher.num_perm}) must be a multiple of bands ({bands})")
+        self.hasher = hasher
+        self.threshold = threshold
+        self.bands = bands
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(i, band.tobytes()) for i, band in enumerate(np.split(signature, self.bands))]
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        self.signatures[key] = signature
+        for band in self._band_keys(signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key: Hashable):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band in self._band_keys(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def query(self, signature: np.ndarray) -> Optional[Hashable]:
+        """The most similar key at or above the threshold, if any."""
+        candidates = set()
+        for band in self._band_keys(signature):
+            candidates |= self._buckets.get(band, set())
+
+        best, best_similarity = None, 0.0
+        for key in candidates:
+            similarity = MinHasher.similarity(signature, self.signatures[key])
+            if similarity >= self.threshold and (best is None or similarity > best_similarity):
+                best, best_similarity = key, similarity
+        return best
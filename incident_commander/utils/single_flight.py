@@ -0,0 +1,128 @@
+import copy
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Tuple
+
+
+class AbandonedCall(Exception):
+    """The leading caller stopped consuming a streamed call before it finished."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers with the same key wait for it.
+
+    ``do`` and ``ado`` return ``(result, shared)``, where ``shared`` is True for callers that
+    waited on another caller's call. Waiters get a deep copy of the result so they can mutate
+    it freely, and see the same exception if the call fails. Keys are released as soon as the
+    call finishes; caching its result is up to the caller.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                return call, True
+            self.coalesced += 1
+            return call, False
+
+    def _wait(self, call: _Call) -> Any:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def _release(self, key: Hashable, call: _Call):
+        with self._lock:
+            del self._calls[key]
+        call.done.set()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        call, leader = self._join(key)
+        if not leader:
+            return self._wait(call), True
+
+        try:
+            result = fn()
+            # Snapshot before the leader's caller can modify the result.
+            call.result = copy.deepcopy(result)
+            return result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._release(key, call)
+
+    def do_stream(self, key: Hashable, fn: Callable[[], Iterator[Any]], result: Callable[[Any], Any] = None) -> Iterator[Tuple[Any, bool]]:
+        """``do`` for a streamed call: yields ``(item, shared)`` pairs.
+
+        The leader yields every item of ``fn()`` as it is produced; waiters yield only the
+        call's result, once the leader has finished. The result is ``result(last item)``, or
+        the last item itself, so ``do`` and ``do_stream`` calls on one key can share it. If
+        the leader stops consuming early, waiters get AbandonedCall and can run the call themselves.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            yield self._wait(call), True
+            return
+
+        last = None
+        try:
+            for item in fn():
+                last = copy.deepcopy(item)
+                yield item, False
+            call.result = last if result is None else result(last)
+        except GeneratorExit:
+            call.error = AbandonedCall(f"Streamed call for {key!r} was abandoned")
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._release(key, call)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        # Tasks cannot be awaited from another event loop.
+        key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._release_task(key))
+            else:
+                self.coalesced += 1
+
+        # Cancelling one caller must not cancel the call the others are waiting on.
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), not leader
+
+    def _release_task(self, key: Hashable):
+        with self._lock:
+            self._tasks.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._calls) + len(self._tasks)
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+            "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+        }
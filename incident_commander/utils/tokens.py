@@ -0,0 +1,28 @@
+import re
+
+# Words, numbers and single punctuation marks: close to WordPiece/BPE counts for runbook text
+# without loading a tokenizer.
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+
+def tail_tokens(text: str, n: int) -> str:
+    """The suffix of ``text`` starting at its n-th last token."""
+    if n <= 0:
+        return ""
+
+    starts = [match.start() for match in TOKEN_PATTERN.finditer(text)]
+    if len(starts) <= n:
+        return text
+    return text[starts[-n]:]
+
+
+def split_tokens(text: str, n: int):
+    """Yield consecutive pieces of ``text`` holding at most ``n`` tokens each."""
+    starts = [match.start() for match in TOKEN_PATTERN.finditer(text)]
+    for i in range(0, len(starts), n):
+        end = starts[i + n] if i + n < len(starts) else len(text)
+        yield text[starts[i]:end].strip()
@@ -0,0 +1,46 @@
+from incident_commander.agents import analyst
+from incident_commander.agents.analyst import AnalystAgent
+
+ALERT = {
+    "service": "checkout",
+    "description": "Pod crash loop after timeout to payments",
+    "metrics": {"cpu": 95, "memory": 40},
+}
+
+
+class StubRAG:
+    def __init__(self, results):
+        self.results = results
+
+    def retrieve_batch(self, queries, top_k=5):
+        return self.results[:len(queries)]
+
+
+def snippet(chunk_id, score):
+    return {"id": chunk_id, "content": f"runbook section {chunk_id}", "score": score}
+
+
+def test_sub_queries_and_root_causes_come_from_the_same_symptoms(monkeypatch):
+    monkeypatch.setattr(analyst, "MAX_SUB_QUERIES", 8)
+    agent = AnalystAgent(rag_tool=StubRAG([]), reranker=object())
+    assert agent._build_sub_queries(ALERT)[1:] == [
+        "checkout high CPU usage", "checkout memory leak", "checkout pod crash OOM kill", "checkout network or database timeout"
+    ]
+    assert set(agent._identify_root_causes(ALERT, [])) == {
+        "High CPU usage - possible resource exhaustion",
+        "Memory leak or insufficient memory allocation",
+        "Pod crash or OOM kill",
+        "Network or database timeout",
+    }
+
+
+def test_fused_results_keep_their_retrieval_score():
+    agent = AnalystAgent(rag_tool=StubRAG([
+        [snippet(1, 0.9), snippet(2, 0.8)],
+        [snippet(2, 0.7), snippet(3, 0.6)],
+    ]), reranker=object())
+    results = agent._retrieve(["a", "b"], top_k=3)
+
+    assert [result["id"] for result in results] == [2, 1, 3]
+    assert [result["score"] for result in results] == [0.8, 0.9, 0.6]
+    assert results[0]["fused_score"] > results[1]["fused_score"]
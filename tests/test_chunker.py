@@ -0,0 +1,65 @@
+from incident_commander.utils.chunker import iter_chunks
+from incident_commander.utils.tokens import count_tokens
+
+RUNBOOK = """# Database
+
+## Risk Level
+
+Low
+
+## Restart
+
+Restart the primary after draining connections.
+
+```bash
+# not a heading
+kubectl rollout restart deploy/db
+
+kubectl get pods
+```
+
+### Verify
+
+Check replication lag on every replica.
+"""
+
+
+def chunks(text, **options):
+    return list(iter_chunks(text.splitlines(), **options))
+
+
+def test_chunks_start_at_headings_and_carry_their_path():
+    assert [path for _, path in chunks(RUNBOOK, max_tokens=200, overlap_tokens=0, min_tokens=0)] == [
+        ["Database"], ["Database", "Risk Level"], ["Database", "Restart"], ["Database", "Restart", "Verify"]
+    ]
+
+    # A section below min_tokens is merged into the next one, under the headings both share.
+    merged = chunks(RUNBOOK, max_tokens=200, overlap_tokens=0, min_tokens=10)
+    assert merged[0][0].startswith("# Database\n\n## Risk Level\n\nLow\n\n## Restart")
+    assert merged[0][1] == ["Database"]
+
+
+def test_fenced_code_is_kept_whole():
+    text, path = chunks(RUNBOOK, max_tokens=200, overlap_tokens=0, min_tokens=0)[2]
+    # The comment line inside the fence is not a heading, and the blank line does not split it.
+    assert "```bash\n# not a heading\nkubectl rollout restart deploy/db\n\nkubectl get pods\n```" in text
+    assert path == ["Database", "Restart"]
+
+    # A code block larger than max_tokens becomes its own chunk instead of being cut.
+    code = "# Code\n\n```\n" + "\n".join(f"echo {i}" for i in range(30)) + "\n```\n\nAfter the block."
+    texts = [text for text, _ in chunks(code, max_tokens=20, overlap_tokens=5, min_tokens=0)]
+    assert texts[0].endswith("echo 29\n```")
+    assert texts[1] == "After the block."
+
+
+def test_split_sections_repeat_the_overlap():
+    words = [f"word{i}" for i in range(60)]
+    texts = [text for text, _ in chunks("# Notes\n\n" + " ".join(words), max_tokens=25, overlap_tokens=5, min_tokens=0)]
+
+    assert len(texts) == 3
+    assert all(count_tokens(text) <= 25 for text in texts)
+    for previous, text in zip(texts, texts[1:]):
+        carried = text.split("\n\n")[0]
+        assert count_tokens(carried) == 5
+        assert previous.endswith(carried)
+    assert texts[-1].endswith("word59")
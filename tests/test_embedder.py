@@ -0,0 +1,107 @@
+import sys
+import subprocess
+import threading
+import numpy as np
+import pytest
+from incident_commander.rag import embedder as embedder_module
+from incident_commander.rag.embedder import Embedder, COLD, LOADING, READY
+from incident_commander.rag.embedding_cache import EmbeddingCache
+from incident_commander.rag.vector_store import VectorStore
+from incident_commander.utils.ttl_cache import TTLCache
+
+DOCUMENTS = [f"restart service{i} after OOMKilled in namespace team{i % 3}" for i in range(20)]
+METADATA = [{"source": f"runbook{i}.md", "section": "restart", "category": f"c{i % 2}"} for i in range(20)]
+
+
+class FakeModel:
+    def __init__(self):
+        self.fail = False
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 16
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        if self.fail:
+            raise RuntimeError("CUDA out of memory")
+        return np.stack([np.random.default_rng(len(text)).standard_normal(16).astype("float32") for text in texts])
+
+
+@pytest.fixture
+def embedder():
+    embedder = Embedder(model_name="fake-model", cache=TTLCache(max_size=16))
+    embedder.model = FakeModel()
+    embedder.state = READY
+    return embedder
+
+
+def test_failed_query_encoding_falls_back_without_caching(embedder):
+    embedder.model.fail = True
+    identity, vectors = embedder.encode_queries(["pods OOMKilled", "disk full"])
+
+    assert identity == embedder.fallback.identity
+    assert vectors == embedder.fallback.embed_batch(["pods OOMKilled", "disk full"])
+    assert len(embedder.query_cache) == 0
+
+    embedder.model.fail = False
+    identity, vectors = embedder.encode_queries(["pods OOMKilled"])
+    assert identity == "fake-model"
+    assert len(vectors[0]) == 16
+
+
+def test_failed_document_encoding_raises(embedder):
+    embedder.model.fail = True
+    with pytest.raises(RuntimeError, match="CUDA out of memory"):
+        embedder.embed_batch(DOCUMENTS)
+
+
+def test_search_serves_lexical_results_when_query_encoding_fails(embedder):
+    vector_store = VectorStore(embedder=embedder, index_type="flat", dedup_threshold=0, embedding_cache=None)
+    vector_store.initialize(DOCUMENTS, METADATA)
+
+    embedder.model.fail = True
+    results = vector_store.search("restart service7", top_k=3, filters={"category": "c1"})
+    assert [result["content"] for result in results] == [
+        result["content"] for result in vector_store.lexical_search("restart service7", top_k=3, filters={"category": "c1"})
+    ]
+    assert results[0]["content"] == DOCUMENTS[7]
+
+    # Nothing is indexed when documents cannot be embedded.
+    with pytest.raises(RuntimeError):
+        vector_store.add_documents(["new runbook"], [{"source": "new.md", "section": "intro"}])
+    assert len(vector_store) == len(DOCUMENTS)
+
+
+def test_non_waiting_check_starts_the_warm_up_instead_of_loading(monkeypatch):
+    release = threading.Event()
+
+    def load(model_name, backend):
+        release.wait(5)
+        return FakeModel()
+
+    monkeypatch.setattr(embedder_module, "load_sentence_transformer", load)
+    embedder = Embedder(model_name="fake-model", cache=TTLCache(max_size=16))
+    embedder.batch_size, embedder.threads = 8, 1
+    assert embedder.state == COLD
+
+    assert not embedder.is_available(wait=False)
+    assert embedder.state == LOADING
+    release.set()
+    assert embedder.is_available()
+    assert embedder.state == READY
+
+
+def test_documents_embed_through_the_cache_unless_it_is_disabled(embedder, tmp_path):
+    assert VectorStore(embedder=embedder, embedding_cache=None).embedding_cache is None
+    assert isinstance(VectorStore(embedder=embedder).embedding_cache, EmbeddingCache)
+
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite"))
+    vector_store = VectorStore(embedder=embedder, index_type="flat", dedup_threshold=0, embedding_cache=cache)
+    vector_store.initialize(DOCUMENTS, METADATA)
+    vector_store.clone().add_documents(DOCUMENTS[:5], METADATA[:5])
+    assert cache.stats()["hits"] == 5
+    assert cache.stats()["misses"] == len(DOCUMENTS)
+
+
+def test_sentence_transformers_is_imported_only_to_load_the_model():
+    code = "import sys, incident_commander.rag.embedder; assert 'sentence_transformers' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,58 @@
+import os
+import time
+import multiprocessing
+import pytest
+from incident_commander.utils.files import file_lock, replacing
+
+
+def append_under_lock(path, tag):
+    with file_lock(path):
+        # Reentrant, as when a sync saves the store while holding its lock.
+        with file_lock(path):
+            with open(path, "a") as f:
+                f.write(f"{tag} start\n")
+                f.flush()
+                time.sleep(0.2)
+                f.write(f"{tag} end\n")
+
+
+def test_file_lock_serializes_processes(tmp_path):
+    path = str(tmp_path / "store")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=append_under_lock, args=(path, tag)) for tag in ("a", "b", "c")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    # Each writer's start and end are adjacent: none ran while another held the lock.
+    assert len(lines) == 6
+    for start, end in zip(lines[::2], lines[1::2]):
+        assert start.split()[0] == end.split()[0]
+
+
+def test_replacing_uses_a_unique_temporary_file(tmp_path):
+    path = str(tmp_path / "rows.json")
+    with replacing(path) as first, replacing(path) as second:
+        assert first != second
+        with open(first, "w") as f:
+            f.write("first")
+        with open(second, "w") as f:
+            f.write("second")
+
+    with open(path) as f:
+        assert f.read() == "first"
+    assert os.listdir(tmp_path) == ["rows.json"]
+
+
+def test_replacing_removes_the_temporary_file_on_error(tmp_path):
+    path = str(tmp_path / "rows.json")
+    with pytest.raises(RuntimeError):
+        with replacing(path) as tmp:
+            with open(tmp, "w") as f:
+                f.write("partial")
+            raise RuntimeError("write failed")
+
+    assert os.listdir(tmp_path) == []
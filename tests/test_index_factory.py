@@ -0,0 +1,87 @@
+import itertools
+import numpy as np
+import pytest
+from incident_commander.rag import index_factory
+from incident_commander.rag.index_factory import (
+    INDEX_TYPES, STORAGE_TYPES, build_index, index_storage, remove_ids, filtered_search, index_ids, reconstruct_all
+)
+
+# Enough vectors to train every index type and 8-bit PQ without falling back.
+VECTORS = np.random.default_rng(0).normal(size=(512, 16)).astype("float32")
+
+
+@pytest.mark.parametrize(
+    "index_type,storage,rescore",
+    list(itertools.product(INDEX_TYPES, STORAGE_TYPES, (False, True))),
+)
+def test_index_storage_reports_build_options(index_type, storage, rescore):
+    index, built_type = build_index(VECTORS, index_type, storage, rescore, ids=np.arange(len(VECTORS)))
+    assert built_type == index_type
+
+    # ivf_pq always stores PQ codes, and only lossy indexes get a re-scoring stage.
+    expected_storage = "pq" if index_type == "ivf_pq" else storage
+    expected_rescore = rescore and (expected_storage != "float32")
+    assert index_storage(index) == (expected_storage, expected_rescore)
+
+
+@pytest.mark.parametrize(
+    "index_type,storage,rescore",
+    [(index_type, storage, rescore) for index_type in INDEX_TYPES for storage, rescore in (("float32", False), ("int8", True))],
+)
+def test_remove_ids_without_rebuilding(index_type, storage, rescore, monkeypatch):
+    ids = np.arange(len(VECTORS), dtype="int64") * 7 + 3
+    index, _ = build_index(VECTORS, index_type, storage, rescore, ids=ids)
+
+    removed = ids[:4]
+    index, tombstones = remove_ids(index, removed)
+    _, labels = filtered_search(index, VECTORS[:4], 5, tombstones=tombstones)
+    assert not np.isin(labels, removed).any()
+    assert set(index_ids(index, tombstones)) == set(ids[4:])
+
+    # Re-adding a removed id (an upsert) finds the new vector, not the removed one.
+    index.add_with_ids(VECTORS[100:101], ids[1:2])
+    _, labels = filtered_search(index, VECTORS[100:101], 2, tombstones=tombstones)
+    assert set(labels[0]) == {ids[1], ids[100]}
+    for brute_force_max in (index_factory.FILTER_BRUTE_FORCE_MAX, 0):
+        monkeypatch.setattr(index_factory, "FILTER_BRUTE_FORCE_MAX", brute_force_max)
+        _, labels = filtered_search(index, VECTORS[100:101], 1, ids=ids[[1, 10]], tombstones=tombstones)
+        assert labels[0][0] == ids[1]
+
+    # Past VECTOR_STORE_COMPACT_RATIO the tombstoned vectors are dropped for good.
+    index, tombstones = remove_ids(index, ids[200:400], tombstones)
+    assert len(tombstones) == 0
+    assert index.ntotal == len(VECTORS) - 4 + 1 - 200
+    assert len(reconstruct_all(index, tombstones)) == index.ntotal
+
+
+@pytest.mark.parametrize(
+    "index_type,storage,rescore",
+    list(itertools.product(INDEX_TYPES, STORAGE_TYPES, (False, True))),
+)
+def test_search_after_delete(index_type, storage, rescore):
+    ids = np.arange(len(VECTORS), dtype="int64") * 7 + 3
+    index, _ = build_index(VECTORS, index_type, storage, rescore, ids=ids)
+
+    removed = ids[:4]
+    index, tombstones = remove_ids(index, removed)
+    _, labels = filtered_search(index, VECTORS[:8], 5, tombstones=tombstones)
+    assert not np.isin(labels, removed).any()
+    assert (labels[4:, 0] == ids[4:8]).mean() >= 0.75
+    assert set(index_ids(index, tombstones)) == set(ids[4:])
+
+
+@pytest.mark.parametrize(
+    "index_type,storage,rescore",
+    list(itertools.product(INDEX_TYPES, STORAGE_TYPES, (False, True))),
+)
+def test_filtered_search(index_type, storage, rescore, monkeypatch):
+    ids = np.arange(len(VECTORS), dtype="int64") * 7 + 3
+    index, _ = build_index(VECTORS, index_type, storage, rescore, ids=ids)
+
+    # Every other vector, searched by the selector path and by the exact scan.
+    allowed = ids[::2]
+    for brute_force_max in (0, len(allowed)):
+        monkeypatch.setattr(index_factory, "FILTER_BRUTE_FORCE_MAX", brute_force_max)
+        _, labels = filtered_search(index, VECTORS[:8], 3, ids=allowed)
+        assert np.isin(labels[labels >= 0], allowed).all()
+        assert (labels[::2, 0] == ids[:8:2]).mean() >= 0.75
@@ -0,0 +1,96 @@
+from incident_commander.rag.embedder import Embedder, READY, FAILED
+from incident_commander.rag.indexer import RunbookIndexer
+from incident_commander.rag.snapshots import IndexSnapshots, RunbookWatcher
+from incident_commander.rag.vector_store import VectorStore
+from incident_commander.utils.ttl_cache import TTLCache
+from .test_embedder import FakeModel
+
+
+def write_runbooks(directory, version):
+    for i in range(4):
+        (directory / f"runbook{i}.md").write_text(
+            f"# Service {i}\n\n## Restart\n\nRestart service{i} pods after OOMKilled, {version}.\n"
+        )
+
+
+def model_embedder():
+    embedder = Embedder(model_name="fake-model", cache=TTLCache(max_size=0))
+    embedder.model = FakeModel()
+    embedder.state = READY
+    return embedder
+
+
+def failed_embedder():
+    embedder = Embedder(model_name="fake-model", cache=TTLCache(max_size=0))
+    embedder.state = FAILED
+    return embedder
+
+
+def open_store(path, embedder):
+    vector_store = VectorStore(embedder=embedder, index_path=str(path), index_type="flat", dedup_threshold=0, embedding_cache=None)
+    vector_store.load()
+    return vector_store
+
+
+def test_index_survives_a_failed_model_and_is_embedded_after_recovery(tmp_path):
+    runbooks, index_path = tmp_path / "runbooks", tmp_path / "index" / "store"
+    runbooks.mkdir()
+    write_runbooks(runbooks, "first")
+    RunbookIndexer(open_store(index_path, model_embedder()), str(runbooks)).sync()
+
+    # The model fails to load while a runbook changes: the model-built index is kept.
+    (runbooks / "runbook2.md").write_text("# Service 2\n\n## Restart\n\nDrain node before restarting service2, second.\n")
+    vector_store = open_store(index_path, failed_embedder())
+    stats = RunbookIndexer(vector_store, str(runbooks)).sync()
+    assert stats["updated"] == 1
+    assert vector_store.embedder_id == "fake-model"
+    assert len(vector_store.unembedded) == 1
+    assert "Drain node" in vector_store.lexical_search("drain node", top_k=1)[0]["content"]
+
+    # The model is back: nothing changed on disk, but the pending chunk gets its embedding.
+    vector_store = open_store(index_path, model_embedder())
+    assert vector_store.embedder_id == "fake-model"
+    assert vector_store.unembedded
+    assert vector_store.needs_embedding()
+    stats = RunbookIndexer(vector_store, str(runbooks)).sync()
+    assert stats["unchanged"] == 4
+    assert stats["chunks_embedded"] == 1
+    assert not vector_store.needs_embedding()
+    assert vector_store.index.ntotal == len(vector_store)
+
+    reloaded = open_store(index_path, model_embedder())
+    assert not reloaded.unembedded
+    assert reloaded.index.ntotal == len(reloaded)
+
+
+def test_fallback_index_is_re_embedded_once_the_model_loads(tmp_path):
+    runbooks, index_path = tmp_path / "runbooks", tmp_path / "index" / "store"
+    runbooks.mkdir()
+    write_runbooks(runbooks, "first")
+
+    vector_store = open_store(index_path, failed_embedder())
+    RunbookIndexer(vector_store, str(runbooks)).sync()
+    assert vector_store.embedder_id == vector_store.embedder.fallback.identity
+
+    vector_store = open_store(index_path, model_embedder())
+    assert vector_store.needs_embedding()
+    stats = RunbookIndexer(vector_store, str(runbooks)).sync()
+    assert stats["added"] == 4
+    assert vector_store.embedder_id == "fake-model"
+    assert vector_store.can_search_dense()
+    assert open_store(index_path, model_embedder()).embedder_id == "fake-model"
+
+
+def test_watcher_runs_the_first_sync_on_its_thread(tmp_path):
+    runbooks, index_path = tmp_path / "runbooks", tmp_path / "index" / "store"
+    runbooks.mkdir()
+    write_runbooks(runbooks, "first")
+    snapshots = IndexSnapshots(open_store(index_path, model_embedder()))
+
+    watcher = RunbookWatcher(snapshots, str(runbooks), interval=60)
+    watcher.start(watch=False)
+    watcher._thread.join(10)
+    assert not watcher._thread.is_alive()
+    assert watcher.last_stats["added"] == 4
+    assert snapshots.version == 2
+    assert len(snapshots.current().lexical_search("restart service2", top_k=1)) == 1
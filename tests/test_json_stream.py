@@ -0,0 +1,31 @@
+import json
+from incident_commander.utils.json_stream import JsonArrayStream
+
+PLAN = {
+    "summary": "restart {the} pod",
+    "steps": [
+        {"action": "drain", "command": "echo \"}]\" \\\\", "args": {"nodes": ["a", "b"]}},
+        {"action": "restart", "risk_score": 0.3},
+    ],
+    "total_risk_score": 0.3,
+}
+
+
+def test_items_are_returned_across_any_chunk_boundary():
+    text = json.dumps(PLAN)
+    for size in (1, 2, 3, 7, len(text)):
+        stream = JsonArrayStream("steps")
+        items = []
+        for start in range(0, len(text), size):
+            items.extend(stream.feed(text[start:start + size]))
+        assert items == PLAN["steps"]
+        assert stream.closed
+        assert json.loads(stream.text) == PLAN
+
+
+def test_each_item_is_returned_as_soon_as_it_closes():
+    stream = JsonArrayStream("steps")
+    assert stream.feed('{"summary": "x", "ste') == []
+    assert stream.feed('ps": [{"action": "drain"}, {"act') == [{"action": "drain"}]
+    assert stream.feed('ion": "restart"') == []
+    assert stream.feed('}], "other": [{"action": "ignored"}]}') == [{"action": "restart"}]
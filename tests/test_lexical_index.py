@@ -0,0 +1,86 @@
+import pytest
+from incident_commander.rag.lexical_index import BM25Index
+from incident_commander.rag.metadata_index import MetadataIndex
+
+DOCUMENTS = [
+    f"Restart service{i % 7} pods after OOMKilled; check pg_stat_activity on db{i % 3} and auth-service logs {i}"
+    for i in range(200)
+]
+METADATA = [
+    {"category": f"c{i % 3}", "tags": [f"t{i % 4}", f"t{i % 5}"], "source": f"runbook{i % 10}.md"}
+    for i in range(200)
+]
+QUERIES = ["OOMKilled service3", "pg_stat_activity db1", "auth logs 17", "nothing matches"]
+FILTERS = [{"category": "c1"}, {"tags": ["t2", "t3"], "source": "runbook4.md"}, {"category": "missing"}]
+
+
+def scores(results):
+    return [(row, round(score, 9)) for row, score in results]
+
+
+@pytest.fixture
+def indexes():
+    lexical = BM25Index()
+    lexical.add(DOCUMENTS)
+    lexical.discard_rows([3, 10, 17])
+    filters = MetadataIndex()
+    filters.add(METADATA)
+    filters.discard_rows([3, 10, 17])
+    return lexical, filters
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_loaded_indexes_match_in_memory_ones(tmp_path, indexes, mmap):
+    lexical, filters = indexes
+    lexical.save(str(tmp_path / "bm25.bin"))
+    filters.save(str(tmp_path / "filters.bin"))
+    loaded_lexical = BM25Index.load(str(tmp_path / "bm25.bin"), mmap=mmap)
+    loaded_filters = MetadataIndex.load(str(tmp_path / "filters.bin"), mmap=mmap)
+
+    assert len(loaded_lexical) == len(lexical)
+    assert len(loaded_filters) == len(filters)
+    for query in QUERIES:
+        assert sorted(scores(loaded_lexical.search(query, top_k=10))) == sorted(scores(lexical.search(query, top_k=10)))
+        allowed = {row for row in range(0, 200, 3)}
+        assert sorted(scores(loaded_lexical.search(query, 5, allowed))) == sorted(scores(lexical.search(query, 5, allowed)))
+    for wanted in FILTERS:
+        assert loaded_filters.select(wanted).tolist() == filters.select(wanted).tolist()
+
+
+def test_loaded_indexes_can_be_changed_and_saved_again(tmp_path, indexes):
+    lexical, filters = indexes
+    lexical.save(str(tmp_path / "bm25.bin"))
+    filters.save(str(tmp_path / "filters.bin"))
+    loaded_lexical = BM25Index.load(str(tmp_path / "bm25.bin"))
+    loaded_filters = MetadataIndex.load(str(tmp_path / "filters.bin"))
+
+    for index in (lexical, loaded_lexical):
+        index.add(["OOMKilled in service3 again"])
+        index.discard_rows([5])
+    for index in (filters, loaded_filters):
+        index.add([{"category": "c1"}])
+        index.discard_rows([5])
+
+    # Saved over the files the loaded copies were mapped from.
+    loaded_lexical.save(str(tmp_path / "bm25.bin"))
+    loaded_filters.save(str(tmp_path / "filters.bin"))
+    reloaded_lexical = BM25Index.load(str(tmp_path / "bm25.bin"))
+    reloaded_filters = MetadataIndex.load(str(tmp_path / "filters.bin"))
+    assert scores(reloaded_lexical.search("OOMKilled service3", top_k=5)) == scores(lexical.search("OOMKilled service3", top_k=5))
+    assert reloaded_filters.select({"category": "c1"}).tolist() == filters.select({"category": "c1"}).tolist()
+
+
+@pytest.mark.parametrize("frozen", [True, False])
+def test_filters_match_non_string_values_as_strings(tmp_path, frozen):
+    filters = MetadataIndex()
+    filters.add([{"category": 1, "tags": [2024, "oom"]}, {"category": "1"}, {"category": True}])
+    filters.extend_row(2, [{"tags": [7]}])
+    if frozen:
+        filters.save(str(tmp_path / "filters.bin"))
+        filters = MetadataIndex.load(str(tmp_path / "filters.bin"))
+
+    assert filters.select({"category": 1}).tolist() == [0, 1]
+    assert filters.select({"category": "1"}).tolist() == [0, 1]
+    assert filters.select({"category": True}).tolist() == [2]
+    assert filters.select({"tags": "2024"}).tolist() == [0]
+    assert filters.select({"tags": [7, "oom"]}).tolist() == [0, 2]
@@ -0,0 +1,102 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from incident_commander.mcp_clients.llm_client import AsyncLLMClient
+from incident_commander.utils.limiter import ConcurrencyLimiter
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+
+        body = json.dumps({"message": {"content": "ok"}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    server.lock = threading.Lock()
+    server.in_flight = server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_in_flight_limit_holds_across_event_loops(stub_server):
+    client = AsyncLLMClient(provider="ollama", model="stub", base_url=f"http://127.0.0.1:{stub_server.server_port}", max_in_flight=2)
+    # A second client for the same endpoint shares its limit.
+    other = AsyncLLMClient(provider="ollama", model="stub", base_url=f"http://127.0.0.1:{stub_server.server_port}", max_in_flight=2)
+    assert other.limiter is client.limiter
+
+    async def burst(llm):
+        return await asyncio.gather(*[llm.generate("prompt") for _ in range(6)])
+
+    results = []
+    threads = [threading.Thread(target=lambda llm=llm: results.extend(asyncio.run(burst(llm)))) for llm in (client, other, client)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["ok"] * 18
+    assert stub_server.peak == 2
+    assert client.limiter.in_flight == 0
+
+
+def test_client_is_closed_with_its_event_loop(stub_server):
+    llm = AsyncLLMClient(provider="ollama", model="stub", base_url=f"http://127.0.0.1:{stub_server.server_port}", max_in_flight=4)
+    clients = []
+
+    async def generate():
+        text = await llm.generate("prompt")
+        clients.append(llm._clients[asyncio.get_running_loop()][0])
+        return text
+
+    assert asyncio.run(generate()) == "ok"
+    assert clients[0].is_closed
+    assert asyncio.run(generate()) == "ok"
+    assert clients[1] is not clients[0]
+    assert clients[1].is_closed
+    assert len(llm._clients) == 0
+
+
+def test_limiter_passes_on_slots_of_cancelled_waiters():
+    limiter = ConcurrencyLimiter(1)
+
+    async def main():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        # Released to the waiter, which is cancelled before it gets to run.
+        limiter.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
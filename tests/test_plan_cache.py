@@ -0,0 +1,32 @@
+from incident_commander.mcp_clients import plan_cache
+from incident_commander.mcp_clients.plan_cache import PlanCache, incident_fingerprint
+
+ALERT = {"service": "checkout", "type": "cpu", "description": "CPU at 91%", "metrics": {"cpu": 91, "memory": 40}}
+
+
+def test_fingerprint_ignores_noise_but_not_the_incident():
+    fingerprint = incident_fingerprint(ALERT, [3, 1, 2])
+
+    # Same metric buckets, chunk order and description do not matter.
+    assert incident_fingerprint(dict(ALERT, description="CPU at 94%", metrics={"memory": 42, "cpu": 94}), [1, 2, 3]) == fingerprint
+    assert incident_fingerprint(dict(ALERT, metrics={"cpu": 50, "memory": 40}), [1, 2, 3]) != fingerprint
+    assert incident_fingerprint(dict(ALERT, service="payments"), [1, 2, 3]) != fingerprint
+    assert incident_fingerprint(ALERT, [1, 2, 4]) != fingerprint
+
+
+def test_plans_expire_after_their_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(plan_cache.time, "time", lambda: now[0])
+    cache = PlanCache(path=str(tmp_path / "plans.sqlite"), ttl_seconds=60)
+    cache.put("abc", {"steps": [{"action": "restart"}]}, generation_seconds=4.0)
+
+    now[0] += 59
+    cached = cache.get("abc")
+    assert cached["plan"] == {"steps": [{"action": "restart"}]}
+    assert cached["age_seconds"] == 59
+
+    now[0] += 2
+    assert cache.get("abc") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+    assert cache.stats()["seconds_saved"] == 4.0
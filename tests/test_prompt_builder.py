@@ -0,0 +1,42 @@
+from incident_commander.mcp_clients.prompt_builder import PromptBuilder, ELISION, SNIPPET_SEPARATOR
+
+ALERT = {"service": "checkout", "description": "pods OOMKilled"}
+
+
+def filler(lines, word):
+    return "\n".join(f"Unrelated {word} note number {i} about general housekeeping." for i in range(lines))
+
+
+RELEVANT = (
+    "## Restart checkout\n\n" + filler(20, "alpha") + "\nCheckout pods OOMKilled: raise the memory limit.\n"
+    + filler(20, "beta") + "\n\n```\nkubectl rollout restart deploy/checkout\n```"
+)
+SNIPPETS = [RELEVANT, "## Scale\n\n" + filler(30, "gamma"), "## Other\n\n" + filler(30, "delta")]
+
+
+def builder(context_tokens):
+    # No tokenizer name: counts are estimated, so the test needs no model download.
+    return PromptBuilder("Plan for {alert_context} using {runbook_snippets}", tokenizer_name="", context_tokens=context_tokens, output_tokens=100)
+
+
+def test_snippets_are_trimmed_to_the_budget_by_score():
+    prompt = builder(400)
+    inputs, report = prompt.build(ALERT, SNIPPETS, [0.9, 0.5, 0.01])
+
+    assert report["prompt_tokens"] <= 400 - 100
+    assert report["prompt_tokens"] == prompt.count(prompt.template) + prompt.count(inputs["alert_context"]) + prompt.count(inputs["runbook_snippets"])
+    assert (report["snippets"], report["trimmed"], report["dropped"]) == (2, 2, 1)
+
+    relevant, scale = inputs["runbook_snippets"].split(SNIPPET_SEPARATOR)
+    # Trimming keeps the heading, the lines that mention the alert and code blocks, in order.
+    assert relevant.startswith("## Restart checkout\n")
+    assert f"{ELISION}\nCheckout pods OOMKilled: raise the memory limit.\n{ELISION}" in relevant
+    assert relevant.endswith("kubectl rollout restart deploy/checkout\n```")
+    assert scale.startswith("## Scale\n")
+    assert prompt.count(relevant) > prompt.count(scale)
+
+
+def test_prompt_within_budget_is_unchanged():
+    inputs, report = builder(4000).build(ALERT, SNIPPETS)
+    assert inputs["runbook_snippets"] == SNIPPET_SEPARATOR.join(SNIPPETS)
+    assert (report["trimmed"], report["dropped"]) == (0, 0)
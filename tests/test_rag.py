@@ -0,0 +1,25 @@
+from incident_commander.mcp_clients.rag import MCPRAG
+from incident_commander.rag.snapshots import IndexSnapshots
+from incident_commander.rag.vector_store import VectorStore
+from incident_commander.utils.ttl_cache import TTLCache
+from .test_embedder import DOCUMENTS, METADATA
+from .test_indexer import model_embedder
+
+
+def test_cached_retrievals_are_invalidated_when_the_index_changes():
+    vector_store = VectorStore(embedder=model_embedder(), index_type="flat", dedup_threshold=0, embedding_cache=None)
+    vector_store.initialize(DOCUMENTS, METADATA)
+    snapshots = IndexSnapshots(vector_store)
+    rag = MCPRAG(snapshots, mode="lexical", cache=TTLCache(max_size=16))
+
+    first = rag.retrieve("rollback deployment", top_k=1)
+    assert rag.retrieve("rollback deployment", top_k=1) == first
+    assert len(rag.cache) == 1
+
+    updated = vector_store.clone()
+    updated.add_documents(["rollback the deployment to the previous revision"], [{"source": "rollback.md", "section": "rollback"}])
+    assert updated.version != vector_store.version
+    snapshots.publish(updated)
+
+    assert rag.retrieve("rollback deployment", top_k=1)[0]["source"] == "rollback.md"
+    assert len(rag.cache) == 2
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from incident_commander.utils.single_flight import SingleFlight, AbandonedCall
+
+
+def slow_stream(items, started=None):
+    if started is not None:
+        started.set()
+    for item in items:
+        time.sleep(0.05)
+        yield item
+
+
+def test_do_stream_waiters_share_the_leaders_result():
+    flights = SingleFlight()
+    started = threading.Event()
+    leader, waiter = [], []
+
+    thread = threading.Thread(target=lambda: leader.extend(flights.do_stream("k", lambda: slow_stream([1, 2, {"plan": 3}], started))))
+    thread.start()
+    started.wait()
+    waiter.extend(flights.do_stream("k", lambda: slow_stream(["not run"]), result=lambda item: item))
+    thread.join()
+
+    assert leader == [(1, False), (2, False), ({"plan": 3}, False)]
+    assert waiter == [({"plan": 3}, True)]
+    assert flights.stats()["coalesced"] == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_do_stream_result_is_shared_with_do_callers():
+    flights = SingleFlight()
+    started = threading.Event()
+    shared = []
+
+    thread = threading.Thread(target=lambda: list(flights.do_stream("k", lambda: slow_stream(["step", {"plan": 1}], started), result=lambda item: item["plan"])))
+    thread.start()
+    started.wait()
+    shared.append(flights.do("k", lambda: "not run"))
+    thread.join()
+
+    assert shared == [(1, True)]
+
+
+def test_do_stream_abandoned_leader_releases_waiters():
+    flights = SingleFlight()
+    leader = flights.do_stream("k", lambda: slow_stream([1, 2, 3]))
+    assert next(leader) == (1, False)
+
+    errors = []
+
+    def wait():
+        try:
+            list(flights.do_stream("k", lambda: slow_stream(["not run"])))
+        except AbandonedCall as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    time.sleep(0.05)
+    leader.close()
+    thread.join(timeout=5)
+
+    assert len(errors) == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_do_propagates_the_leaders_error():
+    flights = SingleFlight()
+    with pytest.raises(ValueError):
+        flights.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flights.do("k", lambda: 2) == (2, False)